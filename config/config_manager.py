@@ -1,58 +1,347 @@
 # config/config_manager.py
-import yaml
+import dataclasses
+import logging
+import os
+import threading
+import types
+import typing
+from collections.abc import Mapping
+from dataclasses import dataclass, field
 from pathlib import Path
-from threading import Lock
+from typing import Callable
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "config.yaml"
+
+
+class ConfigError(ValueError):
+    """config.yaml 內容不合法。"""
+
+
+@dataclass(frozen=True)
+class GpioConfig:
+    thermometer_data_pin: int = 4
+    switch_input_pin: int = 17
+    display_clk_pin: int = 27
+    display_dio_pin: int = 22
+    power_led: int = 10
+    temp_up_switch_pin: int = 9
+    temp_down_switch_pin: int = 11
+
+
+@dataclass(frozen=True)
+class ThermometerConfig:
+    multi_probe: bool = False
+    aggregation: str = "median"
+    outlier_threshold: float = 1.0
+    resolution: int | None = None
+    filter: bool = True
+    process_noise: float = 1e-5
+    measurement_noise: float = 0.03
+    outlier_gate: float = 4.0
+
+
+@dataclass(frozen=True)
+class ModelPredictiveConfig:
+    hold_band: float = 0.4
+    sensor_lag: float = 15.0
+    min_change_interval: float = 10.0
+    fit_interval: float = 30.0
+    heating_rate: float = 0.02
+    loss_rate: float = 1e-4
+    ambient: float = 22.0
+
+
+@dataclass(frozen=True)
+class StrategyConfig:
+    name: str = "two_phase"
+    target_temperature: float = 63.0
+    model_predictive: ModelPredictiveConfig = field(default_factory=ModelPredictiveConfig)
+
+
+@dataclass(frozen=True)
+class AutotuneConfig:
+    run_on_start: bool = False
+    hysteresis: float = 0.2
+    cycles: int = 4
+    max_duration: float = 3600.0
+    max_heatup: float = 10800.0
+    results_path: str = "cache/tuned_parameters.json"
+
+
+@dataclass(frozen=True)
+class DataLoggerConfig:
+    binary_filepath: str | None = None
+
+
+@dataclass(frozen=True)
+class KasaConfig:
+    cache_path: str = "cache/kasa_device.json"
+    discovery_target: str = "255.255.255.255"
+    discovery_timeout: float = 5.0
+    port: int | None = None
+
+
+@dataclass(frozen=True)
+class WatchdogConfig:
+    enabled: bool = False
+    stall_threshold: float = 0.2
+    sample_interval: float = 0.005
+
+
+@dataclass(frozen=True)
+class LoggingConfig:
+    level: str = "INFO"
+    levels: Mapping[str, str] = field(default_factory=lambda: types.MappingProxyType({}))
+    recent_records: int = 500
+
+
+@dataclass(frozen=True)
+class WebUIConfig:
+    server: str = "flask"
+    host: str = "0.0.0.0"
+    port: int = 5000
+    max_connections: int = 8
+    request_timeout: float = 2.0
+
+
+@dataclass(frozen=True)
+class BackendsConfig:
+    """各裝置使用的後端，名稱對應 hardware.backends.BACKENDS。"""
+    thermometer: str = "ds18b20"
+    switch: str = "gpio"
+    temp_buttons: str = "gpio"
+    display: str = "tm1637"
+    led: str = "gpio"
+    plug: str = "kasa"
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    """simulated 後端的參數。"""
+    switch_on: bool = True
+    ambient_temperature: float = 25.0
+    heater_rate: float = 0.05
+    loss_rate: float = 0.001
+    noise: float = 0.05
+    conversion_time: float = 0.75
+    plug_latency: float = 0.05
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    """config.yaml 驗證後的不可變快照；欄位預設值即為檔案中缺少該鍵時的值。"""
+    mode: str = "cook"
+    polling_interval: float = 1.0
+    bulk_interval: float = 5.0
+    near_band: float = 1.0
+    idle_interval: float = 30.0
+    history_capacity: int = 86400
+    asyncio_debug: bool = False
+    strategy: StrategyConfig = field(default_factory=StrategyConfig)
+    autotune: AutotuneConfig = field(default_factory=AutotuneConfig)
+    thermometer: ThermometerConfig = field(default_factory=ThermometerConfig)
+    data_logger: DataLoggerConfig = field(default_factory=DataLoggerConfig)
+    kasa: KasaConfig = field(default_factory=KasaConfig)
+    watchdog: WatchdogConfig = field(default_factory=WatchdogConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+    webui: WebUIConfig = field(default_factory=WebUIConfig)
+    gpio: GpioConfig = field(default_factory=GpioConfig)
+    backends: BackendsConfig = field(default_factory=BackendsConfig)
+    simulation: SimulationConfig = field(default_factory=SimulationConfig)
+
+
+# 執行期間修改即生效的區段（"區段.欄位" 表示區段中只有該欄位即時生效）；其他變更需重新啟動
+RELOADABLE_FIELDS = ("polling_interval", "bulk_interval", "near_band", "idle_interval", "strategy.target_temperature",
+                     "logging")
+
+
+def _restart_needed(old: AppConfig, new: AppConfig, changed: list[str]) -> list[str]:
+    """changed 之中不會即時生效的設定；部分欄位可即時生效的區段逐欄比較（例如 strategy.name）。"""
+    restart_needed = []
+    for name in changed:
+        if name in RELOADABLE_FIELDS:
+            continue
+        if not any(field_name.startswith(f"{name}.") for field_name in RELOADABLE_FIELDS):
+            restart_needed.append(name)
+            continue
+        old_section, new_section = getattr(old, name), getattr(new, name)
+        restart_needed.extend(
+            f"{name}.{f.name}" for f in dataclasses.fields(new_section)
+            if f"{name}.{f.name}" not in RELOADABLE_FIELDS
+            and getattr(old_section, f.name) != getattr(new_section, f.name))
+    return restart_needed
+
+
+def _convert(value, hint, where: str):
+    """依型別註記轉換單一值；不允許的轉換拋出 ConfigError。"""
+    if dataclasses.is_dataclass(hint):
+        if value is None:
+            value = {}
+        if not isinstance(value, dict):
+            raise ConfigError(f"{where}: expected a mapping, got {value!r}")
+        return _build(hint, value, where)
+
+    args = typing.get_args(hint)
+    if type(None) in args:  # X | None
+        if value is None or value == "":
+            return None
+        hint = next(a for a in args if a is not type(None))
+
+    if typing.get_origin(hint) is Mapping or hint is Mapping:
+        if not isinstance(value, dict):
+            raise ConfigError(f"{where}: expected a mapping, got {value!r}")
+        return types.MappingProxyType({str(k): str(v) for k, v in value.items()})
+    if hint is bool:
+        if not isinstance(value, bool):
+            raise ConfigError(f"{where}: expected true/false, got {value!r}")
+        return value
+    if hint is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if hint is str and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if not isinstance(value, hint) or isinstance(value, bool):
+        raise ConfigError(f"{where}: expected {hint.__name__}, got {value!r}")
+    return value
+
+
+def _build(cls, data: dict, prefix: str = ""):
+    hints = typing.get_type_hints(cls)
+    names = {f.name for f in dataclasses.fields(cls)}
+    if prefix:
+        for unknown in sorted(set(data) - names):
+            logger.warning(f"Ignoring unknown config key {prefix}.{unknown}")
+    values = {}
+    for name in names & set(data):
+        values[name] = _convert(data[name], hints[name], f"{prefix}.{name}" if prefix else name)
+    return cls(**values)
+
+
+def _validate(config: AppConfig):
+    if config.polling_interval <= 0 or config.bulk_interval <= 0 or config.idle_interval <= 0:
+        raise ConfigError("polling_interval, bulk_interval and idle_interval must be positive")
+    if config.near_band < 0:
+        raise ConfigError("near_band must not be negative")
+    if not 0.0 <= config.strategy.target_temperature < 100.0:
+        raise ConfigError(f"strategy.target_temperature out of range: {config.strategy.target_temperature}")
+    if config.strategy.name not in ("two_phase", "simple_on_off", "model_predictive"):
+        raise ConfigError(f"strategy.name must be two_phase, simple_on_off or model_predictive, "
+                          f"got {config.strategy.name!r}")
+    if config.autotune.hysteresis <= 0 or config.autotune.cycles < 1:
+        raise ConfigError("autotune.hysteresis must be positive and autotune.cycles at least 1")
+    if config.autotune.max_duration <= 0 or config.autotune.max_heatup <= 0:
+        raise ConfigError("autotune.max_duration and autotune.max_heatup must be positive")
+    if config.webui.server not in ("flask", "asyncio"):
+        raise ConfigError(f"webui.server must be 'flask' or 'asyncio', got {config.webui.server!r}")
+    if config.history_capacity <= 0:
+        raise ConfigError("history_capacity must be positive")
+    if config.thermometer.resolution not in (None, 9, 10, 11, 12):
+        raise ConfigError(f"thermometer.resolution must be 9-12, got {config.thermometer.resolution}")
+    if config.simulation.loss_rate <= 0:
+        raise ConfigError("simulation.loss_rate must be positive")
+
+
+def load_config(path: str | os.PathLike = CONFIG_PATH) -> AppConfig:
+    """讀取並驗證 config.yaml，回傳 AppConfig；檔案或內容不合法時拋出 ConfigError。"""
+    try:
+        with open(path, "r") as f:
+            data = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError) as e:
+        raise ConfigError(f"Failed to load {path}: {e}") from e
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path}: top level must be a mapping")
+    config = _build(AppConfig, data)
+    _validate(config)
+    return config
+
 
 class ConfigManager:
+    """
+    全程式共用的設定來源（singleton）。
+
+    - snapshot：目前的 AppConfig，讀取時不需解析也不需上鎖
+    - start_watching()：背景執行緒檢查檔案 mtime，變更時重新載入並原子替換 snapshot，
+      再以 callback(old, new) 通知訂閱者（在監看執行緒中呼叫）
+    - 新檔案不合法時保留舊的 snapshot
+    """
     _instance = None
-    _lock = Lock()
+    _lock = threading.Lock()
 
     def __new__(cls):
         with cls._lock:
             if cls._instance is None:
                 cls._instance = super(ConfigManager, cls).__new__(cls)
-                cls._instance._load_config()
+                cls._instance._init(CONFIG_PATH)
             return cls._instance
 
-    def _load_config(self):
-        config_path = Path(__file__).resolve().parent.parent / "config.yaml"
+    def _init(self, path: Path):
+        self.path = path
+        self._subscribers: list[Callable[[AppConfig, AppConfig], None]] = []
+        self._watch_thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self._mtime = self._current_mtime()
         try:
-            with open(config_path, 'r') as f:
-                self._config = yaml.safe_load(f) or {}
-        except Exception as e:
-            print(f"[WARN] Failed to load config.yaml: {e}")
-            self._config = {}
+            self.snapshot = load_config(path)
+        except ConfigError as e:
+            logger.warning(f"{e}; using defaults")
+            self.snapshot = AppConfig()
 
-    def get_string(self, key, default=""):
-        return str(self._get_nested(key, default))
-
-    def get_int(self, key, default=0):
+    def _current_mtime(self) -> float | None:
         try:
-            return int(self._get_nested(key, default))
-        except (ValueError, TypeError):
-            return default
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def subscribe(self, callback: Callable[[AppConfig, AppConfig], None]):
+        self._subscribers.append(callback)
 
-    def get_float(self, key, default=0.0):
+    def unsubscribe(self, callback: Callable[[AppConfig, AppConfig], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def reload(self) -> bool:
+        """重新載入設定檔；內容有變且合法時替換 snapshot 並通知訂閱者，回傳是否替換。"""
+        self._mtime = self._current_mtime()
         try:
-            return float(self._get_nested(key, default))
-        except (ValueError, TypeError):
-            return default
-
-    def get_bool(self, key, default=False):
-        value = self._get_nested(key, default)
-        if isinstance(value, bool):
-            return value
-        return str(value).lower() in ("1", "true", "yes")
-
-    def get_dict(self, key):
-        return self._get_nested(key, {})
-
-    def _get_nested(self, dotted_key, default):
-        keys = dotted_key.split(".")
-        value = self._config
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-        return value
\ No newline at end of file
+            new = load_config(self.path)
+        except ConfigError as e:
+            logger.error(f"Config reload rejected, keeping previous settings: {e}")
+            return False
+        old = self.snapshot
+        if new == old:
+            return False
+        self.snapshot = new
+
+        changed = [f.name for f in dataclasses.fields(AppConfig) if getattr(old, f.name) != getattr(new, f.name)]
+        restart_needed = _restart_needed(old, new, changed)
+        logger.info(f"Config reloaded, changed: {', '.join(changed)}")
+        if restart_needed:
+            logger.warning(f"Changes to {', '.join(restart_needed)} take effect after a restart")
+        for callback in list(self._subscribers):
+            try:
+                callback(old, new)
+            except Exception as e:
+                logger.error(f"Config subscriber {callback} failed: {e}", exc_info=True)
+        return True
+
+    def start_watching(self, interval: float = 2.0):
+        """啟動檔案監看執行緒；若已在執行則不做任何事。"""
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._watch_thread = threading.Thread(target=self._watch, args=(interval,), name="ConfigWatcher", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self):
+        self._stop_event.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join()
+            self._watch_thread = None
+
+    def _watch(self, interval: float):
+        while not self._stop_event.wait(interval):
+            if self._current_mtime() != self._mtime:
+                self.reload()
@@ -0,0 +1,291 @@
+# cooker/binary_log.py
+"""
+固定寬度的二進位加熱紀錄格式，以及 mmap 讀取器與 TSV 轉換工具。
+
+檔案格式（little-endian）：
+- 檔頭 16 bytes：magic "SVLOG\\0"、版本 (u16)、每筆紀錄大小 (u16)、保留 6 bytes
+- 每筆紀錄 16 bytes：epoch timestamp (f64)、溫度 (f32)、旗標 (u8)、保留 3 bytes
+  旗標 bit0 = 加熱中，bit1 = 插座狀態未知
+
+稀疏索引存在同名 .idx 檔，每 INDEX_STRIDE 筆紀錄寫入一筆 (timestamp f64, 紀錄序號 u64)。
+索引只用來縮小二分搜尋範圍；遺失或過期時讀取器會直接在資料檔上做二分搜尋。
+
+用法：
+    python -m cooker.binary_log convert logs/heating_log.tsv logs/heating_log.bin
+    python -m cooker.binary_log query logs/heating_log.bin 2025-01-01T14:00 2025-01-01T16:00
+"""
+
+import argparse
+import bisect
+import gzip
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SVLOG\x00"
+VERSION = 1
+HEADER = struct.Struct("<6sHH6x")
+RECORD = struct.Struct("<dfB3x")
+INDEX_ENTRY = struct.Struct("<dQ")
+INDEX_STRIDE = 256
+
+FLAG_HEATING = 0x01
+FLAG_UNKNOWN = 0x02
+
+
+def encode_flags(heating: bool | None) -> int:
+    if heating is None:
+        return FLAG_UNKNOWN
+    return FLAG_HEATING if heating else 0
+
+
+def decode_flags(flags: int) -> bool | None:
+    if flags & FLAG_UNKNOWN:
+        return None
+    return bool(flags & FLAG_HEATING)
+
+
+class BinaryLogWriter:
+    """
+    以附加模式寫入二進位紀錄，並同步維護稀疏時間索引。
+    讀取器的二分搜尋需要時間不遞減；系統時間倒退（例如沒有 RTC 的 Pi 在開機後由 NTP 校時）時，
+    倒退的 timestamp 會被夾到上一筆的時間，紀錄仍然保留，直到時間追上為止。
+    """
+
+    def __init__(self, filepath: str):
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        self.filepath = filepath
+        self._file = open(filepath, "ab")
+        self._last_timestamp = float("-inf")
+        self.clamped = 0  # 被夾到上一筆時間的紀錄數
+        self._clamping = False
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            self._count = 0
+        else:
+            _check_header(filepath)
+            # 忽略上次異常結束時寫到一半的紀錄
+            self._count = (self._file.tell() - HEADER.size) // RECORD.size
+            expected = HEADER.size + self._count * RECORD.size
+            if self._file.tell() != expected:
+                logger.warning(f"Truncating partial record at end of {filepath}")
+                self._file.truncate(expected)
+                self._file.seek(expected)
+            if self._count:
+                with open(filepath, "rb") as f:
+                    f.seek(expected - RECORD.size)
+                    self._last_timestamp = RECORD.unpack(f.read(RECORD.size))[0]
+        self._truncate_index(filepath + ".idx")
+        self._index = open(filepath + ".idx", "ab")
+
+    def _truncate_index(self, index_path: str):
+        """異常結束後，索引可能有寫到一半的項目，或指向沒寫進資料檔的紀錄；截掉這些項目。"""
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, "r+b") as f:
+            data = f.read()
+            valid = 0
+            for _, record in INDEX_ENTRY.iter_unpack(data[:len(data) - len(data) % INDEX_ENTRY.size]):
+                if record >= self._count:
+                    break
+                valid += INDEX_ENTRY.size
+            if valid != len(data):
+                logger.warning(f"Truncating {len(data) - valid} bytes of stale index entries in {index_path}")
+                f.truncate(valid)
+
+    def append(self, timestamp: float, temperature: float, heating: bool | None):
+        if timestamp < self._last_timestamp:
+            if not self._clamping:
+                logger.warning(f"Clock went backwards by {self._last_timestamp - timestamp:.1f}s, "
+                               f"clamping timestamps in {self.filepath}")
+            self._clamping = True
+            self.clamped += 1
+            timestamp = self._last_timestamp
+        else:
+            self._clamping = False
+        if self._count % INDEX_STRIDE == 0:
+            self._index.write(INDEX_ENTRY.pack(timestamp, self._count))
+        self._file.write(RECORD.pack(timestamp, temperature, encode_flags(heating)))
+        self._last_timestamp = timestamp
+        self._count += 1
+
+    def flush(self):
+        self._file.flush()
+        self._index.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BinaryLogReader:
+    """
+    以 mmap 讀取二進位紀錄。range() 用二分搜尋定位時間區間，回傳不複製資料的 memoryview。
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        _check_header(filepath)
+        self._file = open(filepath, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._count = (size - HEADER.size) // RECORD.size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._count else None
+        self._index_times, self._index_records = self._load_index(filepath + ".idx")
+
+    def _load_index(self, index_path: str) -> tuple[list[float], list[int]]:
+        times, records = [], []
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as f:
+                data = f.read()
+            usable = len(data) - len(data) % INDEX_ENTRY.size
+            for timestamp, record in INDEX_ENTRY.iter_unpack(data[:usable]):
+                if record < self._count:
+                    times.append(timestamp)
+                    records.append(record)
+        return times, records
+
+    def __len__(self):
+        return self._count
+
+    def _timestamp_at(self, record: int) -> float:
+        return struct.unpack_from("<d", self._mmap, HEADER.size + record * RECORD.size)[0]
+
+    def _bisect_left(self, timestamp: float) -> int:
+        """回傳第一筆 timestamp >= 指定時間的紀錄序號。"""
+        lo, hi = 0, self._count
+        if self._index_times:
+            # 先用稀疏索引把搜尋範圍縮到一個區塊
+            i = bisect.bisect_left(self._index_times, timestamp)
+            if i > 0:
+                lo = self._index_records[i - 1]
+            if i < len(self._index_records):
+                hi = self._index_records[i]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._timestamp_at(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(self, start: float | None = None, end: float | None = None) -> memoryview:
+        """回傳時間區間 [start, end) 內紀錄的原始 bytes（memoryview，不複製）。"""
+        if self._mmap is None:
+            return memoryview(b"")
+        lo = 0 if start is None else self._bisect_left(start)
+        hi = self._count if end is None else self._bisect_left(end)
+        hi = max(lo, hi)
+        return memoryview(self._mmap)[HEADER.size + lo * RECORD.size:HEADER.size + hi * RECORD.size]
+
+    def records(self, start: float | None = None, end: float | None = None):
+        """逐筆產生 (timestamp, temperature, heating)。"""
+        for timestamp, temperature, flags in RECORD.iter_unpack(self.range(start, end)):
+            yield timestamp, temperature, decode_flags(flags)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_header(filepath: str):
+    with open(filepath, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{filepath} is not a binary heating log (truncated header)")
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{filepath} is not a supported binary heating log")
+
+
+def rotated_log_files(filepath: str, backup_count: int = 5) -> list[str]:
+    """回傳存在的輪替檔（含 .gz 壓縮檔），由舊到新排列：.5 ... .1、主檔。"""
+    files = []
+    for i in reversed(range(1, backup_count + 1)):
+        for candidate in (f"{filepath}.{i}", f"{filepath}.{i}.gz"):
+            if os.path.exists(candidate):
+                files.append(candidate)
+    if os.path.exists(filepath):
+        files.append(filepath)
+    return files
+
+
+def read_tsv(filepath: str):
+    """逐筆讀取 DataLogger 的 TSV 紀錄（支援 .gz），產生 (timestamp, temperature, heating)。"""
+    opener = gzip.open if filepath.endswith(".gz") else open
+    with opener(filepath, "rt") as f:
+        for line_no, line in enumerate(f, 1):
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) != 3:
+                continue
+            try:
+                timestamp = datetime.fromisoformat(parts[0]).timestamp()
+                temperature = float(parts[1])
+                heating = None if parts[2] == "" else bool(int(parts[2]))
+            except ValueError:
+                logger.warning(f"Skipping malformed line {line_no} in {filepath}")
+                continue
+            yield timestamp, temperature, heating
+
+
+def convert_tsv(tsv_paths: list[str], out_path: str) -> int:
+    """把 TSV 紀錄依序轉成二進位格式（附加到 out_path），回傳寫入筆數。"""
+    count = 0
+    last_timestamp = float("-inf")
+    with BinaryLogWriter(out_path) as writer:
+        for path in tsv_paths:
+            for timestamp, temperature, heating in read_tsv(path):
+                # 二分搜尋需要時間遞增，跳過倒退的紀錄（例如系統校時）
+                if timestamp < last_timestamp:
+                    continue
+                writer.append(timestamp, temperature, heating)
+                last_timestamp = timestamp
+                count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary heating log tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    convert = sub.add_parser("convert", help="Convert TSV logs (including rotated .1-.5 files) to binary")
+    convert.add_argument("tsv", help="Base TSV log path, e.g. logs/heating_log.tsv")
+    convert.add_argument("out", help="Output binary log path")
+
+    query = sub.add_parser("query", help="Print records in [start, end)")
+    query.add_argument("log", help="Binary log path")
+    query.add_argument("start", help="ISO time, e.g. 2025-01-01T14:00")
+    query.add_argument("end", help="ISO time, e.g. 2025-01-01T16:00")
+
+    args = parser.parse_args()
+    if args.command == "convert":
+        files = rotated_log_files(args.tsv)
+        count = convert_tsv(files, args.out)
+        print(f"Converted {count} records from {len(files)} file(s) into {args.out}")
+    else:
+        start = datetime.fromisoformat(args.start).timestamp()
+        end = datetime.fromisoformat(args.end).timestamp()
+        with BinaryLogReader(args.log) as reader:
+            for timestamp, temperature, heating in reader.records(start, end):
+                print(f"{datetime.fromtimestamp(timestamp).isoformat()}\t{temperature:.2f}\t{heating}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,110 +1,313 @@
+import dataclasses
+import inspect
 import logging
-import asyncio
-from hardware.thermometer import Thermometer
-from hardware.display import DisplayManager
-from hardware.power_led import PowerLED
+import math
+import time
+from hardware.backends import create_backend
+from hardware.temperature_sampler import TemperatureSampler
+from model.temperature_estimator import TemperatureEstimator, quantization_std
+from hardware.output_actor import OutputActor
 from hardware.kasa_client import KasaClient
-from hardware.temp_button_manager import TempButtonManager
 from cooker.temp_control_strategy import TemperatureControlStrategy
-from cooker.simple_on_off_strategy import SimpleOnOffStrategy
-from cooker.two_phase_strategy import TwoPhaseStrategy
+from cooker.strategies import STRATEGIES
+from cooker.relay_autotune import RelayAutotuneStrategy, load_tuned_parameters, save_tuned_parameters
 from cooker.data_logger import DataLogger
+from cooker.stall_watchdog import LoopStallWatchdog
+from cooker.tick_scheduler import TickScheduler, adaptive_interval
+from config.config_manager import AppConfig
 from model.system_status import SystemStatus
+from model.temperature_history import MultiResolutionHistory
+from model.tick_metrics import TickMetrics
 
 logger = logging.getLogger(__name__)
 
 
 class SousVideController:
-    def __init__(self, config: dict):
+    MAX_SAMPLE_AGE = 5.0  # 溫度樣本超過此秒數視為過期
+
+    def __init__(self, config: AppConfig):
         self.active = False
-        self.thermometer = Thermometer()
-        self.display = DisplayManager()
-        self.kasa_client = KasaClient()
-        self.mode = config.get("mode", "normal")
-        self.power_led = PowerLED()
-        self.data_logger = DataLogger()
+        backends = config.backends
+        thermometer_backend = backends.thermometer
+        if thermometer_backend == "ds18b20" and config.thermometer.multi_probe:
+            thermometer_backend = "multi_probe"
+        if thermometer_backend == "multi_probe":
+            self.thermometer = create_backend(
+                "thermometer", "multi_probe",
+                aggregation=config.thermometer.aggregation,
+                outlier_threshold=config.thermometer.outlier_threshold,
+                resolution=config.thermometer.resolution,
+            )
+        elif thermometer_backend == "ds18b20":
+            self.thermometer = create_backend("thermometer", "ds18b20", resolution=config.thermometer.resolution)
+        else:
+            self.thermometer = create_backend("thermometer", thermometer_backend)
+        self.metrics = TickMetrics()
+        self.temperature_sampler = TemperatureSampler(
+            self.thermometer, metrics=self.metrics, estimator=self._create_estimator(config))
+        self.display = create_backend("display", backends.display)
+        self.kasa_client = KasaClient(device_client=create_backend("plug", backends.plug))
+        self.mode = config.mode
+        self.power_led = create_backend("led", backends.led)
+        # 顯示器與 LED 由輸出執行緒負責寫入，控制迴圈只投遞畫面
+        self.output = OutputActor(self.display, self.power_led, metrics=self.metrics)
+        self.data_logger = DataLogger(binary_filepath=config.data_logger.binary_filepath)
+        self.history = MultiResolutionHistory(capacity=config.history_capacity)
+        self._last_recorded_sample_time: float | None = None  # 已寫入歷史與加熱紀錄的最新樣本
+        self.stall_watchdog = None
+        if config.watchdog.enabled:
+            self.stall_watchdog = LoopStallWatchdog(
+                stall_threshold=config.watchdog.stall_threshold,
+                sample_interval=config.watchdog.sample_interval,
+            )
         # self.temp_control_input = TempButtonManager()
 
-        # self.control_strategy: TemperatureControlStrategy = SimpleOnOffStrategy()
-        self.control_strategy: TemperatureControlStrategy = TwoPhaseStrategy()
+        self._config = config
+        # 上次自動調參的結果（{策略名稱: 參數}），優先於 config.yaml 的設定
+        self.tuned_parameters = load_tuned_parameters(config.autotune.results_path)
+        self.control_strategy: TemperatureControlStrategy = self._create_strategy(
+            config.strategy.target_temperature)
         self.current_plug_state = None  # 輔助LED燈號
+        self.scheduler = TickScheduler(metrics=self.metrics)
+        self.control_strategy.set_wakeup_callback(self.request_wakeup)
+        self.autotune: RelayAutotuneStrategy | None = None
+        self.last_autotune: dict | None = None  # 最近一次調參結束時的狀態
+        self._suspended_strategy: TemperatureControlStrategy | None = None  # 調參期間暫停的策略
+        self._autotune_request: str | None = None  # "start" / "cancel"，由下一個 tick 處理
+        self._autotune_on_activation = config.autotune.run_on_start  # 開關第一次打開時開始調參
 
 
 
         self._status = SystemStatus(
             thermometer=self.thermometer,
             kasa_client=self.kasa_client,
-            stragey=self.control_strategy,
+            strategy=self.control_strategy,
             controller=self,
         )
 
         logger.debug(f"SousVideController initialized with mode={self.mode}")
 
+    def _create_strategy(self, target_temperature: float) -> TemperatureControlStrategy:
+        name = self._config.strategy.name
+        strategy_cls = STRATEGIES[name]
+        params = getattr(self._config.strategy, name, None)  # 有專屬設定區段的策略（例如 model_predictive）
+        params = dataclasses.asdict(params) if params is not None else {}
+        accepted = inspect.signature(strategy_cls).parameters
+        tuned = {key: value for key, value in self.tuned_parameters.get(name, {}).items() if key in accepted}
+        params.update(tuned)
+        logger.info("Using %s strategy%s", name, f" with tuned parameters {tuned}" if tuned else "")
+        return strategy_cls(target_temperature=target_temperature, **params)
+
+    def _set_strategy(self, strategy: TemperatureControlStrategy):
+        self.control_strategy = strategy
+        self._status.strategy = strategy
+        strategy.set_wakeup_callback(self.request_wakeup)
+
+    def request_autotune(self, action: str):
+        """
+        要求開始（"start"）或取消（"cancel"）自動調參；可從任何執行緒呼叫（例如 Flask），
+        實際切換在下一個 tick 進行。開關關閉時不接受開始（ValueError）。
+        """
+        if action not in ("start", "cancel"):
+            raise ValueError(f"Unknown autotune action: {action!r}")
+        if action == "start" and not self.active:
+            raise ValueError("Cannot start autotune while the switch is off")
+        self._autotune_request = action
+
+    def get_autotune_status(self) -> dict:
+        if self.autotune is not None:
+            return self.autotune.status()
+        return self.last_autotune or {"running": False}
+
+    def _process_autotune_request(self):
+        action, self._autotune_request = self._autotune_request, None
+        if action == "start" and not self.active:
+            # 要求送出後、tick 之前開關被關掉
+            logger.warning("Dropping autotune start request: the switch is off")
+        elif action == "start" and self.autotune is None:
+            settings = self._config.autotune
+            self.autotune = RelayAutotuneStrategy(
+                target_temperature=self.control_strategy.target_temperature,
+                hysteresis=settings.hysteresis,
+                cycles=settings.cycles,
+                max_duration=settings.max_duration,
+                max_heatup=settings.max_heatup,
+                ambient=self._config.strategy.model_predictive.ambient,
+            )
+            self._suspended_strategy = self.control_strategy
+            self._set_strategy(self.autotune)
+            logger.info("Autotune requested around %.2f°C", self.autotune.target_temperature)
+        elif action == "cancel" and self.autotune is not None:
+            self.autotune.abort("cancelled")
+
+    def _finish_autotune(self):
+        autotune, self.autotune = self.autotune, None
+        self.last_autotune = autotune.status()
+        target_temperature = self._suspended_strategy.target_temperature
+        if autotune.result is not None:
+            try:
+                save_tuned_parameters(self._config.autotune.results_path, autotune.result)
+            except OSError as e:
+                logger.error("Failed to save tuned parameters: %s", e)
+            self.tuned_parameters = autotune.result.strategies
+            self._set_strategy(self._create_strategy(target_temperature))
+        else:
+            self._set_strategy(self._suspended_strategy)
+        self._suspended_strategy = None
+
+    @staticmethod
+    def _create_estimator(config: AppConfig) -> TemperatureEstimator | None:
+        thermometer = config.thermometer
+        if not thermometer.filter:
+            return None
+        # 低解析度時量化誤差變大，量測雜訊要一併計入
+        measurement_noise = math.hypot(thermometer.measurement_noise, quantization_std(thermometer.resolution or 12))
+        return TemperatureEstimator(process_noise=thermometer.process_noise, measurement_noise=measurement_noise,
+                                    gate=thermometer.outlier_gate)
+
     def get_system_status(self):
         return self._status
 
     async def control_led(self):
         if self.active:
-            self.power_led.set_heating(self.current_plug_state)
+            self.output.set_heating(bool(self.current_plug_state))
         else:
-            self.power_led.turn_off()
+            self.output.led_off()
+
+    def close(self):
+        """程式結束時呼叫（在 event loop 中呼叫）：寫完佇列中的加熱紀錄並停止背景執行緒。"""
+        if self.stall_watchdog is not None:
+            self.stall_watchdog.stop()
+        self.temperature_sampler.stop()
+        self.data_logger.close()
+
+    def request_wakeup(self, delay: float):
+        """要求控制迴圈最晚在 delay 秒後 tick 一次（在 event loop 中呼叫）。"""
+        self.scheduler.request_wakeup(delay)
+
+    def next_tick_interval(self, config: AppConfig) -> float:
+        """依目前狀態決定下一次 tick 的間隔：未啟動時幾乎閒置，啟動時依距離目標的溫差與升溫速率調整。"""
+        if not self.active:
+            return config.idle_interval
+        sample = self.temperature_sampler.get_latest()
+        return adaptive_interval(
+            temperature=sample[1] if sample is not None else None,
+            target=self.control_strategy.target_temperature,
+            rate=self.temperature_sampler.get_rate(),
+            near_interval=config.polling_interval,
+            bulk_interval=config.bulk_interval,
+            near_band=config.near_band,
+        )
+
+    def change_target_temperature(self, degree_to_change: float):
+        """溫度上調 / 下調按鈕的處理（在 event loop 中呼叫）；調參期間套用到調參結束後的策略。"""
+        (self._suspended_strategy or self.control_strategy).change_target_temperature(degree_to_change)
+
+    def set_target_temperature(self, target_temperature: float):
+        """設定檔的目標溫度改變時呼叫（在 event loop 中呼叫）。"""
+        (self._suspended_strategy or self.control_strategy).target_temperature = target_temperature
+        logger.info(f"Target temperature set to {target_temperature:.2f}°C from config")
 
     async def on_switch_changed(self, on: bool):
         self.active = on
+        if not on and self.autotune is not None:
+            self.autotune.abort("switch turned off")
+            self._finish_autotune()
         if self.mode == "switch_detect":
             logger.info(f"[switch_detect] Switch is now: {'ON' if on else 'OFF'}")
         elif not on:
             logger.info("🔴 Switch turned OFF. Stopping sous-vide process and turning off plug.")
             await self.kasa_client.turn_off()
-            self.display.clear()
+            self.output.clear()
         else:
             logger.info("🟢 Switch turned ON. System set to active, awaiting temperature control.")
+        if on and self._autotune_on_activation:
+            self._autotune_on_activation = False
+            self._autotune_request = "start"
 
     async def _handle_inactive_state(self):
         """處理舒肥機非活動狀態時的邏輯。"""
         logger.debug("Sous-vide inactive. Tick skipped.")
         await self.kasa_client.turn_off()  # 確保插座關閉
-        self.display.clear()  # 清空顯示器
+        self.output.clear()  # 清空顯示器
 
     async def _handle_active_state(self):
         """處理舒肥機活動狀態時的核心溫控邏輯。"""
         try:
-            # 1. 讀取溫度
-            # temperature = self.thermometer.read_temperature()
-            temperature = await asyncio.to_thread(self.thermometer.read_temperature)
-            logger.info(f"Current temperature: {temperature:.2f}°C")
-            self.display.show_temperature(temperature)
+            # 1. 取用背景取樣執行緒的最新溫度（不阻塞）
+            metrics = self.metrics
+            with metrics.stage("sample"):
+                sample = self.temperature_sampler.get_latest()
+            if sample is None:
+                logger.info("Waiting for the first temperature sample.")
+                return
+            sample_time, temperature = sample
+            if time.time() - sample_time > self.MAX_SAMPLE_AGE:
+                raise RuntimeError(
+                    f"Temperature sample is stale ({time.time() - sample_time:.1f}s old), "
+                    f"last sampler error: {self.temperature_sampler.last_error}")
+            logger.info("Current temperature: %.2f°C", temperature)
+            with metrics.stage("display"):
+                self.output.show_temperature(temperature)
 
             # 2. 讓溫控策略決定行動
-            self.current_plug_state = self.kasa_client.is_on()
-            self.data_logger.log(temperature, self.current_plug_state)
+            with metrics.stage("plug_state"):
+                self.current_plug_state = self.kasa_client.is_on()
+            # 提早喚醒的 tick 可能還沒有新樣本，只記錄新的樣本，避免重複的時間點
+            if self._last_recorded_sample_time is None or sample_time > self._last_recorded_sample_time:
+                self._last_recorded_sample_time = sample_time
+                with metrics.stage("data_logger"):
+                    self.data_logger.log(temperature, self.current_plug_state)
+                with metrics.stage("history"):
+                    self.history.append(sample_time, temperature, self.current_plug_state)
             if self.current_plug_state is None:
                 logger.warning("Failed to get current plug state, assuming OFF.")
-            action_to_take = await self.control_strategy.decide_action(temperature, self.current_plug_state)
+            with metrics.stage("strategy"):
+                action_to_take = await self.control_strategy.decide_action(temperature, self.current_plug_state)
 
             if action_to_take is not None:
-                if action_to_take:
-                    await self.kasa_client.turn_on()
-                else:
-                    await self.kasa_client.turn_off()
+                with metrics.stage("actuate"):
+                    if action_to_take:
+                        await self.kasa_client.turn_on()
+                    else:
+                        await self.kasa_client.turn_off()
 
         except KeyboardInterrupt as e:
             logger.info("KeyboardInterrupt received, stopping sous-vide process.")
-            self.display.clear()
+            self.output.clear()
             await self.kasa_client.turn_off()
             raise
 
         except Exception as e:
+            self.metrics.increment("tick_errors_total")
             logger.error(f"Error during active state handling: {e}", exc_info=True)
-            self.display.show_text("Err")
+            self.output.show_text("Err")
             await self.kasa_client.turn_off()  # 錯誤時保險起見關閉插座
 
     async def tick(self):
         logger.debug("Tick called in SousVideController.")
+        tick_start = time.perf_counter()
         await self.kasa_client.start_updater()  # 確保智能插座的狀態更新任務正在運行
+        self.temperature_sampler.start()  # 確保溫度取樣執行緒正在運行
+        self.output.start()  # 確保顯示器 / LED 輸出執行緒正在運行
+        if self.stall_watchdog is not None:
+            # 卡住偵測的心跳會週期性喚醒 loop，只在啟動期間執行，閒置時不打斷事件驅動的等待
+            if self.active:
+                self.stall_watchdog.start()
+            else:
+                self.stall_watchdog.stop()
         """主循環中的週期性處理函式。"""
+        if self._autotune_request is not None:
+            self._process_autotune_request()
         if not self.active:
             await self._handle_inactive_state()
         else:
             await self._handle_active_state()
-        await self.control_led()
+        if self.autotune is not None and self.autotune.finished:
+            self._finish_autotune()
+        with self.metrics.stage("led"):
+            await self.control_led()
+        tick_latency = time.perf_counter() - tick_start
+        self.metrics.observe("tick", tick_latency)
+        self.metrics.increment("ticks_total")
+        self._status.publish_tick(tick_latency)
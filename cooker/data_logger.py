@@ -1,63 +1,196 @@
 # services/data_logger.py
 
+import gzip
 import os
 import logging
+import queue
+import shutil
+import threading
+import time
 from datetime import datetime
 
+from cooker.binary_log import BinaryLogWriter
+
 logger = logging.getLogger(__name__)
 
 
 class DataLogger:
-    def __init__(self, filepath: str = "logs/heating_log.tsv", buffer_size: int = 30):
+    """
+    加熱紀錄寫入器。
+    log() 只把紀錄放進有上限的佇列，實際的格式化、寫檔與輪替都在背景執行緒完成，
+    控制迴圈不會因為 SD 卡寫入緩慢而卡住。佇列滿時丟棄新紀錄並計數。
+
+    背景執行緒累積到 buffer_size 筆或 flush_interval 秒就寫入一次，
+    每次寫入前檢查檔案大小並輪替；輪替出來的 .1 檔會在另一個執行緒壓縮成 .1.gz。
+    二進位紀錄與其 .idx 索引跟 TSV 一起輪替（任一個超過 max_bytes 時），但不壓縮，讀取器才能直接 mmap。
+    """
+
+    def __init__(self, filepath: str = "logs/heating_log.tsv", buffer_size: int = 30,
+                 binary_filepath: str | None = None, flush_interval: float = 5.0,
+                 queue_size: int = 1000, compress_rotated: bool = True):
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         self.filepath = filepath
-        self._buffer = []
         self._buffer_size = buffer_size
+        self._flush_interval = flush_interval
         self.backup_count = 5
         self.max_bytes = 1024 * 1024 * 5  # 每個檔案最大 5MB
+        self.compress_rotated = compress_rotated
+        self.dropped = 0  # 佇列滿而被丟棄的紀錄數
 
-    def log(self, temperature: float, heating: bool):
-        timestamp = datetime.now().isoformat()
-        line = f"{timestamp}\t{temperature:.2f}\t{int(heating)}\n"
-        self._buffer.append(line)
+        self._binary_filepath = binary_filepath
+        self._binary_writer: BinaryLogWriter | None = None  # 由背景執行緒開啟
 
-        if len(self._buffer) >= self._buffer_size:
-            self._flush()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._compress_thread: threading.Thread | None = None
+        self._writer_thread = threading.Thread(target=self._run_writer, name="DataLogger", daemon=True)
+        self._writer_thread.start()
 
-    def _flush(self):
+    def log(self, temperature: float, heating: bool | None):
         try:
-            with open(self.filepath, "a") as f:
-                f.writelines(self._buffer)
-                f.flush()
-            logger.debug(f"Flushed {len(self._buffer)} log lines to file.")
-        except Exception as e:
-            logger.warning(f"Failed to flush log buffer: {e}")
-        finally:
-            self._buffer.clear()
+            self._queue.put_nowait((time.time(), temperature, heating))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.warning(f"DataLogger queue full, dropped {self.dropped} record(s) so far.")
+
+    def flush(self, timeout: float | None = 5.0):
+        """外部強制 flush：等待背景執行緒寫完目前佇列中的紀錄。可在程式結束時呼叫。"""
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            logger.warning("DataLogger: Queue full, flush request dropped.")
+            return
+        done.wait(timeout)
+
+    def close(self, timeout: float | None = 5.0):
+        """寫完剩餘紀錄並停止背景執行緒；程式結束時呼叫。"""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("DataLogger: Queue full, close request dropped.")
+            return
+        self._writer_thread.join(timeout)
+        if self._writer_thread.is_alive():
+            logger.warning("DataLogger: writer thread did not finish within the timeout.")
+
+    def _run_writer(self):
+        batch = []
+        deadline = time.monotonic() + self._flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = False  # 時間到
+
+            if isinstance(item, tuple):
+                batch.append(item)
+                if len(batch) < self._buffer_size:
+                    continue
+
+            # 批次寫入：滿批、逾時、flush 或 close
+            if batch:
+                self._write_batch(batch)
+                batch = []
+            deadline = time.monotonic() + self._flush_interval
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                if self._binary_writer is not None:
+                    self._binary_writer.close()
+                return
 
-    def flush(self):
-        """外部強制 flush 緩衝區。可在程式結束時呼叫。"""
+    def _write_batch(self, batch: list[tuple]):
         try:
-            # rotate if size too big
-            if os.path.exists(self.filepath) and os.path.getsize(self.filepath) > self.max_bytes:
+            if self._exceeds_max_bytes(self.filepath) or (
+                    self._binary_filepath and self._exceeds_max_bytes(self._binary_filepath)):
                 self._rotate_file()
+                if self._binary_filepath:
+                    self._rotate_binary_file()
         except Exception as e:
             logger.warning(f"Failed to rotate log file: {e}")
 
-        if self._buffer:
-            self._flush()
+        lines = [
+            # 插座狀態未知時 TSV 欄位留空
+            f"{datetime.fromtimestamp(ts).isoformat()}\t{temperature:.2f}\t{'' if heating is None else int(heating)}\n"
+            for ts, temperature, heating in batch
+        ]
+        try:
+            with open(self.filepath, "a") as f:
+                f.writelines(lines)
+                f.flush()
+            logger.debug(f"Flushed {len(lines)} log lines to file.")
+        except Exception as e:
+            logger.warning(f"Failed to flush log buffer: {e}")
 
-    def _rotate_file(self):
-        # 關掉現有 buffer（防止 race condition）
-        self._flush()
+        if self._binary_filepath:
+            try:
+                if self._binary_writer is None:
+                    self._binary_writer = BinaryLogWriter(self._binary_filepath)
+                for record in batch:
+                    self._binary_writer.append(*record)
+                self._binary_writer.flush()
+            except Exception as e:
+                logger.warning(f"Failed to flush binary log buffer: {e}")
+
+    def _exceeds_max_bytes(self, path: str) -> bool:
+        return os.path.exists(path) and os.path.getsize(path) > self.max_bytes
+
+    def _rotate_binary_file(self):
+        """二進位紀錄改名成 .1（索引改名成 .1.idx，與讀取器的 "<檔名>.idx" 慣例一致），下一批寫入時開新檔。"""
+        if self._binary_writer is not None:
+            self._binary_writer.close()
+            self._binary_writer = None
 
-        # Rotate 舊檔案（最多保留 N 個）
+        base = self._binary_filepath
+        for suffix in ("", ".idx"):
+            oldest = f"{base}.{self.backup_count}{suffix}"
+            if os.path.exists(oldest):
+                os.remove(oldest)
         for i in reversed(range(1, self.backup_count)):
-            src = f"{self.filepath}.{i}"
-            dst = f"{self.filepath}.{i + 1}"
+            for suffix in ("", ".idx"):
+                src = f"{base}.{i}{suffix}"
+                if os.path.exists(src):
+                    os.replace(src, f"{base}.{i + 1}{suffix}")
+        for src, dst in ((base, f"{base}.1"), (f"{base}.idx", f"{base}.1.idx")):
             if os.path.exists(src):
-                os.rename(src, dst)
+                os.replace(src, dst)
+        logger.info(f"Rotated {base} -> {base}.1")
+
+    def _rotate_file(self):
+        # 等上一次的壓縮完成，避免 .1 在壓縮途中被改名
+        if self._compress_thread is not None:
+            self._compress_thread.join()
+
+        # 刪除最舊的一份，再 Rotate 舊檔案（最多保留 N 個），壓縮與未壓縮的都要處理
+        for suffix in ("", ".gz"):
+            oldest = f"{self.filepath}.{self.backup_count}{suffix}"
+            if os.path.exists(oldest):
+                os.remove(oldest)
+        for i in reversed(range(1, self.backup_count)):
+            for suffix in ("", ".gz"):
+                src = f"{self.filepath}.{i}{suffix}"
+                dst = f"{self.filepath}.{i + 1}{suffix}"
+                if os.path.exists(src):
+                    os.replace(src, dst)
 
         # 原始檔案改名成 .1
         if os.path.exists(self.filepath):
-            os.rename(self.filepath, f"{self.filepath}.1")
+            rotated = f"{self.filepath}.1"
+            os.replace(self.filepath, rotated)
+            logger.info(f"Rotated {self.filepath} -> {rotated}")
+            if self.compress_rotated:
+                self._compress_thread = threading.Thread(
+                    target=self._compress, args=(rotated,), name="DataLoggerCompress", daemon=True)
+                self._compress_thread.start()
+
+    @staticmethod
+    def _compress(path: str):
+        try:
+            with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(path)
+            logger.debug(f"Compressed rotated log {path}")
+        except Exception as e:
+            logger.warning(f"Failed to compress rotated log {path}: {e}")
@@ -0,0 +1,186 @@
+# cooker/model_predictive_strategy.py
+import logging
+import math
+import time
+from typing import Callable
+
+from cooker.temp_control_strategy import TemperatureControlStrategy
+
+logger = logging.getLogger(__name__)
+
+
+class ThermalModelEstimator:
+    """
+    以遞迴最小平方法（RLS，含遺忘因子）線上擬合水浴模型
+        dT/dt = a·u − b·T + c
+    a 為加熱造成的升溫速率（°C/s），b 為散熱係數（1/s），c = b·環境溫度。
+    每次 update 只做固定的 3x3 運算；初始值與其不確定度作為先驗，
+    例如一直在加熱時 a 與 c 無法分辨，估計值就會停在先驗附近而不會發散。
+    """
+
+    def __init__(self, heating_rate: float, loss_rate: float, ambient: float, forgetting: float = 0.995):
+        self.theta = [heating_rate, loss_rate, loss_rate * ambient]  # [a, b, c]
+        # 先驗的變異數：約為初始值的量級
+        self._p = [
+            [heating_rate ** 2, 0.0, 0.0],
+            [0.0, loss_rate ** 2, 0.0],
+            [0.0, 0.0, (loss_rate * max(abs(ambient), 10.0)) ** 2],
+        ]
+        self.forgetting = forgetting
+        self.updates = 0
+
+    def update(self, duty: float, temperature: float, slope: float):
+        """加入一筆觀測：duty 為期間的平均加熱比例，temperature 為平均溫度，slope 為觀測到的 dT/dt。"""
+        phi = (duty, -temperature, 1.0)
+        p, lam = self._p, self.forgetting
+        p_phi = [sum(p[i][j] * phi[j] for j in range(3)) for i in range(3)]
+        denominator = lam + sum(phi[i] * p_phi[i] for i in range(3))
+        gain = [v / denominator for v in p_phi]
+        error = slope - sum(self.theta[i] * phi[i] for i in range(3))
+        self.theta = [self.theta[i] + gain[i] * error for i in range(3)]
+        self._p = [[(p[i][j] - gain[i] * p_phi[j]) / lam for j in range(3)] for i in range(3)]
+        self.updates += 1
+
+    @property
+    def heating_rate(self) -> float:
+        return max(self.theta[0], 1e-6)
+
+    @property
+    def loss_rate(self) -> float:
+        return max(self.theta[1], 1e-7)
+
+    @property
+    def offset(self) -> float:
+        return self.theta[2]
+
+    def slope(self, temperature: float, heating: bool) -> float:
+        return (self.heating_rate if heating else 0.0) - self.loss_rate * temperature + self.offset
+
+    def equilibrium(self, heating: bool) -> float:
+        return ((self.heating_rate if heating else 0.0) + self.offset) / self.loss_rate
+
+    def time_to_reach(self, start: float, end: float, heating: bool) -> float:
+        """
+        在固定的加熱狀態下，從 start 走到 end 所需秒數（加熱時往上、停止時往下）。
+        start 已經超過 end 時回傳 0.0；end 不在 start 與平衡溫度之間（到不了）時回傳 math.inf。
+        """
+        if (start >= end) if heating else (start <= end):
+            return 0.0
+        equilibrium = self.equilibrium(heating)
+        if start == equilibrium:
+            return math.inf
+        ratio = (end - equilibrium) / (start - equilibrium)
+        if not 0.0 < ratio < 1.0:
+            return math.inf  # 平衡溫度在 start 與 end 之間，或水溫正往反方向走
+        return -math.log(ratio) / self.loss_rate
+
+
+class ModelPredictiveStrategy(TemperatureControlStrategy):
+    """
+    ModelPredictiveStrategy：以線上擬合的熱模型計算加熱脈衝長度，盡量減少插座切換。
+    - 估計水溫：感測器讀值 + sensor_lag × 模型預測的升溫速率（補償探針的量測延遲）
+    - 加熱中：估計水溫到達 目標 + hold_band/2 時關閉，並要求在預計到達的時間點重新評估
+    - 停止中：估計水溫跌破 目標 − hold_band/2 才再開啟，並要求在預計跌破的時間點重新評估
+    每個保溫週期只有一開一關兩次切換，週期長度由散熱速度決定；hold_band 越寬，切換越少。
+
+    clock 可注入時間來源（預設 time.monotonic），供離線重播與基準測試使用。
+    """
+
+    def __init__(self, target_temperature: float = 63.0, hold_band: float = 0.4, sensor_lag: float = 15.0,
+                 min_change_interval: float = 10.0, fit_interval: float = 30.0, heating_rate: float = 0.02,
+                 loss_rate: float = 1e-4, ambient: float = 22.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            target_temperature (float): 目標溫度（°C）。
+            hold_band (float): 保溫時允許的溫度區間寬度（°C），以目標為中心。
+            sensor_lag (float): 探針的量測延遲（秒）。
+            min_change_interval (float): 兩次切換的最小間隔（秒），也是最短的加熱脈衝。
+            fit_interval (float): 每累積多少秒的資料做一次模型更新。
+            heating_rate, loss_rate, ambient: 模型初始值（°C/s、1/s、°C）。
+        """
+        self.target_temperature = target_temperature
+        self.hold_band = hold_band
+        self.sensor_lag = sensor_lag
+        self._min_change_interval = min_change_interval
+        self._fit_interval = fit_interval
+        self._clock = clock
+        self.model = ThermalModelEstimator(heating_rate, loss_rate, ambient)
+
+        self._last_observed_state: bool | None = None
+        self._last_actual_change_time = -math.inf
+        # 目前累積中的觀測區間
+        self._window_start: tuple[float, float] | None = None  # (時間, 溫度)
+        self._last_sample: tuple[float, float, bool] | None = None  # (時間, 溫度, 加熱中)
+        self._duty_integral = 0.0
+        self._temperature_integral = 0.0
+        self._unreachable_warned = False  # 已記錄過加熱到不了目標，避免每個 tick 重複
+
+    def change_target_temperature(self, degree_to_change: float):
+        """改變目標溫度（正數升高，負數降低）。"""
+        self.target_temperature += round(degree_to_change, 1)
+        logger.info(f"目標溫度已改變為 {self.target_temperature:.2f}°C")
+
+    def _observe(self, now: float, temperature: float, heating: bool):
+        """累積 (加熱比例, 溫度) 的時間積分，滿 fit_interval 秒就更新一次模型。"""
+        if self._last_sample is not None:
+            last_time, last_temperature, last_heating = self._last_sample
+            dt = now - last_time
+            self._duty_integral += dt * last_heating
+            self._temperature_integral += dt * (temperature + last_temperature) / 2
+        else:
+            self._window_start = (now, temperature)
+        self._last_sample = (now, temperature, heating)
+
+        start_time, start_temperature = self._window_start
+        elapsed = now - start_time
+        if elapsed >= self._fit_interval:
+            self.model.update(self._duty_integral / elapsed, self._temperature_integral / elapsed,
+                              (temperature - start_temperature) / elapsed)
+            logger.debug("Thermal model: heating %.5f°C/s, loss %.6f/s, ambient %.1f°C",
+                         self.model.heating_rate, self.model.loss_rate, self.model.offset / self.model.loss_rate)
+            self._window_start = (now, temperature)
+            self._duty_integral = self._temperature_integral = 0.0
+
+    def _update_state(self, now: float, heating: bool):
+        if self._last_observed_state is not None and self._last_observed_state != heating:
+            self._last_actual_change_time = now
+        self._last_observed_state = heating
+
+    async def decide_action(self, current_temperature: float, current_plug_is_on: bool) -> bool | None:
+        now = self._clock()
+        heating = bool(current_plug_is_on)
+        self._update_state(now, heating)
+        self._observe(now, current_temperature, heating)
+
+        model = self.model
+        water = current_temperature + self.sensor_lag * model.slope(current_temperature, heating)
+        upper = self.target_temperature + self.hold_band / 2
+        lower = self.target_temperature - self.hold_band / 2
+        logger.debug("ModelPredictive: sensor %.2f°C, estimated water %.2f°C, plug %s",
+                     current_temperature, water, "ON" if heating else "OFF")
+
+        since_change = now - self._last_actual_change_time
+        if since_change < self._min_change_interval:
+            self.request_wakeup(self._min_change_interval - since_change)
+            return None
+
+        if heating:
+            if water >= upper:
+                logger.info("估計水溫 %.2f°C 已達 %.2f°C，停止加熱。", water, upper)
+                return False
+            time_to_upper = model.time_to_reach(water, upper, heating=True)
+            if math.isinf(time_to_upper):
+                if not self._unreachable_warned:
+                    logger.warning("模型預測全力加熱只能到 %.2f°C，到不了 %.2f°C（加熱器功率不足或散熱太快）。",
+                                   model.equilibrium(heating=True), upper)
+                    self._unreachable_warned = True
+            else:
+                self._unreachable_warned = False
+            self.request_wakeup(time_to_upper)
+        else:
+            if water < lower:
+                logger.info("估計水溫 %.2f°C 低於 %.2f°C，開始加熱（預計 %.0f 秒）。",
+                            water, lower, model.time_to_reach(water, upper, heating=True))
+                return True
+            self.request_wakeup(model.time_to_reach(water, lower, heating=False))
+        return None
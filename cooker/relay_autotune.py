@@ -0,0 +1,274 @@
+# cooker/relay_autotune.py
+"""
+Relay feedback 自動調參：以遲滯開關控制水浴，讓水溫在目標附近穩定振盪，
+從振盪的週期、振幅、過衝與延遲推算各策略的參數，存成 JSON，下次啟動時載入。
+
+    加熱  ：水溫 < 目標 − hysteresis
+    停止  ：水溫 > 目標 + hysteresis
+    先升溫（或降溫）到目標附近，水溫第一次穿越 目標 ± hysteresis 後才開始振盪階段；
+    第一個振盪半週期帶有升溫的過衝，不列入計算，之後收集 cycles 個完整週期。
+    升溫與振盪各有時間上限（max_heatup、max_duration）。
+
+推算規則（lag = 切換後到水溫轉折的平均時間，overshoot = 關閉後超過切換點的平均溫度）：
+    simple_on_off.offset             = overshoot（提前關閉的溫差剛好抵銷過衝）
+    two_phase.band                   = 2 × overshoot（全力加熱時預留兩倍過衝的距離）
+    *.min_change_interval            = lag（比延遲更短的切換看不到效果）
+    model_predictive.sensor_lag      = lag
+    model_predictive.heating_rate / loss_rate：由升溫與降溫斜率求得
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable
+
+from cooker.temp_control_strategy import TemperatureControlStrategy
+
+logger = logging.getLogger(__name__)
+
+TUNED_PARAMETERS_VERSION = 1
+
+
+@dataclass
+class _HalfCycle:
+    """一次切換到下一次切換之間的紀錄。"""
+    heating: bool
+    start_time: float
+    start_temperature: float
+    extreme: float  # 加熱時為最低溫，停止時為最高溫
+    extreme_time: float
+    end_time: float | None = None
+    end_temperature: float | None = None
+
+
+@dataclass
+class AutotuneResult:
+    target_temperature: float
+    hysteresis: float
+    period: float  # 秒
+    amplitude: float  # °C，峰對峰值的一半
+    lag: float  # 秒
+    overshoot: float  # °C
+    undershoot: float  # °C
+    heating_slope: float  # °C/s
+    cooling_slope: float  # °C/s
+    strategies: dict[str, dict[str, float]] = field(default_factory=dict)
+    tuned_at: float = field(default_factory=time.time)
+
+
+class RelayAutotuneStrategy(TemperatureControlStrategy):
+    """
+    以 relay feedback 實驗取代溫控策略；完成（或失敗）後 finished 為 True，結果在 result。
+    決定一樣交給控制器經 KasaClient 執行，所以插座延遲也會算進 lag。
+    """
+
+    def __init__(self, target_temperature: float = 63.0, hysteresis: float = 0.2, cycles: int = 4,
+                 max_duration: float = 3600.0, max_heatup: float = 10800.0, ambient: float = 22.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            target_temperature (float): 振盪中心（°C）。
+            hysteresis (float): 開關的遲滯寬度（°C），需大於感測器雜訊。
+            cycles (int): 收集幾個完整週期（升溫與第一個振盪半週期不算）。
+            max_duration (float): 振盪階段最長秒數（從第一次穿越 目標 ± hysteresis 起算），超過即放棄。
+            max_heatup (float): 升溫到目標附近的最長秒數，超過即放棄。
+            ambient (float): 環境溫度（°C），用於由降溫斜率推算散熱係數。
+        """
+        self.target_temperature = target_temperature
+        self.hysteresis = hysteresis
+        self.cycles = cycles
+        self.max_duration = max_duration
+        self.max_heatup = max_heatup
+        self.ambient = ambient
+        self._clock = clock
+
+        self._started: float | None = None  # 第一次 decide_action
+        self._oscillation_started: float | None = None  # 第一次穿越 目標 ± hysteresis
+        self._first_half_cycle: int | None = None  # 振盪階段第一個半週期的索引
+        self._seen_band = False  # 水溫是否曾落在 目標 ± hysteresis 之內
+        self._relay: bool | None = None
+        self._half_cycles: list[_HalfCycle] = []
+        self.finished = False
+        self.result: AutotuneResult | None = None
+        self.error: str | None = None
+
+    def change_target_temperature(self, degree_to_change: float):
+        """調參期間不接受改變目標溫度（振盪中心改變會讓結果失真）。"""
+        logger.warning("Autotune in progress, ignoring target temperature change of %+.1f°C", degree_to_change)
+
+    def status(self) -> dict:
+        now = self._clock()
+        return {
+            "running": not self.finished,
+            "phase": "heating_up" if self._oscillation_started is None else "oscillating",
+            "heatup_elapsed": 0.0 if self._started is None else
+            round((self._oscillation_started or now) - self._started, 1),
+            "elapsed": 0.0 if self._oscillation_started is None else round(now - self._oscillation_started, 1),
+            "cycles": max(0, self._completed_cycles()),
+            "target_cycles": self.cycles,
+            "error": self.error,
+            "result": asdict(self.result) if self.result is not None else None,
+        }
+
+    def abort(self, reason: str):
+        if not self.finished:
+            logger.warning("Autotune aborted: %s", reason)
+            self.error = reason
+            self.finished = True
+
+    def _measured_half_cycles(self) -> list[_HalfCycle]:
+        """振盪階段中已結束、列入計算的半週期（不含帶有升溫過衝的第一個）。"""
+        if self._first_half_cycle is None:
+            return []
+        return [h for h in self._half_cycles[self._first_half_cycle + 1:] if h.end_time is not None]
+
+    def _completed_cycles(self) -> int:
+        return len(self._measured_half_cycles()) // 2
+
+    def _switch(self, now: float, temperature: float, heating: bool):
+        if self._half_cycles:
+            previous = self._half_cycles[-1]
+            previous.end_time = now
+            previous.end_temperature = temperature
+        self._half_cycles.append(_HalfCycle(heating, now, temperature, temperature, now))
+        self._relay = heating
+        if self._oscillation_started is None and self._seen_band:
+            self._oscillation_started = now
+            self._first_half_cycle = len(self._half_cycles) - 1
+            logger.info("Autotune: reached %.2f°C after %.0fs, oscillation started",
+                        temperature, now - self._started)
+        logger.info("Autotune: relay %s at %.2f°C (%d/%d cycles)",
+                    "ON" if heating else "OFF", temperature, self._completed_cycles(), self.cycles)
+
+    async def decide_action(self, current_temperature: float, current_plug_is_on: bool) -> bool | None:
+        if self.finished:
+            return False
+        now = self._clock()
+        if self._started is None:
+            self._started = now
+            logger.info("Autotune started around %.2f°C (hysteresis %.2f°C)",
+                        self.target_temperature, self.hysteresis)
+        if self._oscillation_started is None:
+            if now - self._started > self.max_heatup:
+                self.abort(f"did not reach {self.target_temperature:.1f}°C within {self.max_heatup:.0f}s")
+                return False
+        elif now - self._oscillation_started > self.max_duration:
+            self.abort(f"no stable oscillation within {self.max_duration:.0f}s")
+            return False
+
+        lower = self.target_temperature - self.hysteresis
+        upper = self.target_temperature + self.hysteresis
+        if lower <= current_temperature <= upper:
+            self._seen_band = True
+        if current_temperature < lower and self._relay is not True:
+            self._switch(now, current_temperature, True)
+        elif current_temperature > upper and self._relay is not False:
+            self._switch(now, current_temperature, False)
+        elif self._half_cycles:
+            current = self._half_cycles[-1]
+            if (current_temperature < current.extreme) if current.heating else (current_temperature > current.extreme):
+                current.extreme = current_temperature
+                current.extreme_time = now
+
+        if self._completed_cycles() >= self.cycles:
+            try:
+                self.result = self._analyze()
+                logger.info("Autotune finished: period %.0fs, amplitude %.2f°C, lag %.0fs, overshoot %.2f°C",
+                            self.result.period, self.result.amplitude, self.result.lag, self.result.overshoot)
+            except ValueError as e:
+                self.error = str(e)
+                logger.error("Autotune failed: %s", e)
+            self.finished = True
+            return False
+
+        if self._relay is None:
+            return None  # 還在遲滯區間內且尚未切換過：維持現狀
+        return self._relay if self._relay != bool(current_plug_is_on) else None
+
+    def _analyze(self) -> AutotuneResult:
+        half_cycles = self._measured_half_cycles()
+        heating = [h for h in half_cycles if h.heating]
+        cooling = [h for h in half_cycles if not h.heating]
+        if not heating or not cooling:
+            raise ValueError("not enough relay cycles")
+
+        on_times = [h.start_time for h in half_cycles if h.heating]
+        period = (on_times[-1] - on_times[0]) / (len(on_times) - 1) if len(on_times) > 1 else \
+            sum(h.end_time - h.start_time for h in half_cycles[:2])
+        peak = sum(h.extreme for h in cooling) / len(cooling)
+        trough = sum(h.extreme for h in heating) / len(heating)
+        lag = sum(h.extreme_time - h.start_time for h in half_cycles) / len(half_cycles)
+        overshoot = peak - (self.target_temperature + self.hysteresis)
+        undershoot = (self.target_temperature - self.hysteresis) - trough
+
+        def slope(h: _HalfCycle) -> float:
+            # 轉折之後到下一次切換的平均斜率
+            duration = h.end_time - h.extreme_time
+            return (h.end_temperature - h.extreme) / duration if duration > 0 else math.nan
+
+        heating_slopes = [s for s in map(slope, heating) if s > 0]
+        cooling_slopes = [-s for s in map(slope, cooling) if s < 0]
+        if not heating_slopes or not cooling_slopes:
+            raise ValueError("could not measure heating / cooling slopes")
+        heating_slope = sum(heating_slopes) / len(heating_slopes)
+        cooling_slope = sum(cooling_slopes) / len(cooling_slopes)
+
+        overshoot = max(overshoot, 0.0)
+        min_change_interval = round(min(max(lag, 5.0), 120.0))
+        loss_rate = cooling_slope / max(self.target_temperature - self.ambient, 1.0)
+        return AutotuneResult(
+            target_temperature=self.target_temperature,
+            hysteresis=self.hysteresis,
+            period=round(period, 1),
+            amplitude=round((peak - trough) / 2, 3),
+            lag=round(lag, 1),
+            overshoot=round(overshoot, 3),
+            undershoot=round(max(undershoot, 0.0), 3),
+            heating_slope=round(heating_slope, 6),
+            cooling_slope=round(cooling_slope, 6),
+            strategies={
+                "simple_on_off": {
+                    "offset": round(min(max(overshoot, 0.1), 5.0), 2),
+                    "min_change_interval": min_change_interval,
+                },
+                "two_phase": {
+                    "band": round(min(max(2 * overshoot, 0.5), 10.0), 1),
+                    "min_change_interval": min_change_interval,
+                },
+                "model_predictive": {
+                    "sensor_lag": round(min(lag, 120.0), 1),
+                    "min_change_interval": min_change_interval,
+                    "heating_rate": round(heating_slope + cooling_slope, 6),
+                    "loss_rate": round(loss_rate, 8),
+                },
+            },
+        )
+
+
+def save_tuned_parameters(path: str, result: AutotuneResult):
+    """寫入 JSON（先寫暫存檔再取代，避免斷電留下半個檔案）。"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": TUNED_PARAMETERS_VERSION, **asdict(result)}, f, indent=2)
+    os.replace(tmp_path, path)
+    logger.info("Tuned parameters saved to %s", path)
+
+
+def load_tuned_parameters(path: str) -> dict[str, dict[str, float]]:
+    """讀取各策略的調參結果；檔案不存在或格式不符時回傳空 dict。"""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable tuned parameters %s: %s", path, e)
+        return {}
+    if data.get("version") != TUNED_PARAMETERS_VERSION or not isinstance(data.get("strategies"), dict):
+        logger.warning("Ignoring tuned parameters %s with unexpected format", path)
+        return {}
+    return data["strategies"]
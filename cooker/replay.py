@@ -0,0 +1,166 @@
+# cooker/replay.py
+"""
+離線重播：把 logs/heating_log.tsv*（或二進位紀錄）中的溫度序列，以虛擬時鐘餵給任一
+TemperatureControlStrategy.decide_action，比較不同策略與參數的行為。
+
+這是開環重播：溫度來自實際紀錄，不會因策略的決定而改變；插座狀態則假設策略的決定立即生效。
+適合比較開關次數、決策延遲，以及在同一條溫度曲線上策略「想要」怎麼做。
+溫度落在目標區間內的時間只反映紀錄本身（與策略無關）；要比較策略的控溫效果請用閉環的
+tools.strategy_benchmark。
+
+用法：
+    python -m cooker.replay logs/heating_log.tsv --strategy two_phase --target 63 \\
+        --param band=3 --param min_change_interval=20
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from cooker.binary_log import BinaryLogReader, read_tsv, rotated_log_files
+from cooker.strategies import STRATEGIES
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualClock:
+    """可注入策略的虛擬時鐘，由重播引擎推進。"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@dataclass
+class ReplayResult:
+    start: float
+    end: float
+    samples: int = 0
+    switches: int = 0  # 策略造成的插座切換次數
+    recorded_switches: int = 0  # 紀錄中實際發生的切換次數
+    recorded_time_in_band: float = 0.0  # 紀錄中溫度落在目標 ± band 內的秒數（開環重播，與策略無關）
+    decision_latencies: list[float] = field(default_factory=list, repr=False)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    @property
+    def recorded_in_band_ratio(self) -> float:
+        return self.recorded_time_in_band / self.duration if self.duration > 0 else 0.0
+
+    def latency_percentile(self, q: float) -> float:
+        if not self.decision_latencies:
+            return 0.0
+        ordered = sorted(self.decision_latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def load_records(path: str):
+    """讀取單一紀錄檔，依副檔名判斷格式，產生 (timestamp, temperature, heating)。"""
+    if path.endswith(".bin") or path.rsplit(".", 1)[0].endswith(".bin"):  # 含輪替出來的 .bin.1
+        with BinaryLogReader(path) as reader:
+            yield from reader.records()
+    else:
+        yield from read_tsv(path)
+
+
+def split_sessions(records, max_gap: float = 300.0) -> list[list[tuple]]:
+    """依時間間隔切分成多段烹調紀錄；間隔超過 max_gap 秒視為新的一段。"""
+    sessions, current, last = [], [], None
+    for record in records:
+        if last is not None and (record[0] - last > max_gap or record[0] < last):
+            sessions.append(current)
+            current = []
+        current.append(record)
+        last = record[0]
+    if current:
+        sessions.append(current)
+    return sessions
+
+
+async def replay_session(strategy, clock: VirtualClock, records: list[tuple], band: float = 0.5,
+                         max_gap: float = 300.0) -> ReplayResult:
+    """以虛擬時鐘把一段紀錄餵給策略，回傳統計結果。"""
+    result = ReplayResult(start=records[0][0], end=records[-1][0])
+    plug_on = False
+    recorded_state = None
+    for i, (timestamp, temperature, recorded_heating) in enumerate(records):
+        clock.now = timestamp
+
+        started = time.perf_counter()
+        action = await strategy.decide_action(temperature, plug_on)
+        result.decision_latencies.append(time.perf_counter() - started)
+
+        if action is not None and action != plug_on:
+            plug_on = action
+            result.switches += 1
+        if recorded_heating is not None:
+            if recorded_state is not None and recorded_heating != recorded_state:
+                result.recorded_switches += 1
+            recorded_state = recorded_heating
+
+        if i + 1 < len(records) and abs(temperature - strategy.target_temperature) <= band:
+            result.recorded_time_in_band += min(records[i + 1][0] - timestamp, max_gap)
+        result.samples += 1
+    return result
+
+
+async def replay(strategy_name: str, paths: list[str], target: float, params: dict,
+                 band: float = 0.5, max_gap: float = 300.0) -> list[ReplayResult]:
+    """重播所有檔案；每段烹調紀錄使用一個新的策略實例。"""
+    records = (record for path in paths for record in load_records(path))
+    results = []
+    for session in split_sessions(records, max_gap):
+        clock = VirtualClock(session[0][0])
+        strategy = STRATEGIES[strategy_name](target_temperature=target, clock=clock, **params)
+        results.append(await replay_session(strategy, clock, session, band, max_gap))
+    return results
+
+
+def _parse_param(text: str) -> tuple[str, float]:
+    key, _, value = text.partition("=")
+    if not key or not value:
+        raise argparse.ArgumentTypeError(f"Expected key=value, got '{text}'")
+    return key, float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay heating logs against a control strategy")
+    parser.add_argument("logs", nargs="+", help="Log files; a base .tsv or .bin path also pulls in its rotated .1-.5 files")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="two_phase")
+    parser.add_argument("--target", type=float, default=63.0, help="Target temperature (°C)")
+    parser.add_argument("--param", type=_parse_param, action="append", default=[],
+                        help="Strategy parameter, e.g. band=3 or min_change_interval=20")
+    parser.add_argument("--band", type=float, default=0.5,
+                        help="Half-width of the window for the recorded session's in-band time (°C)")
+    parser.add_argument("--max-gap", type=float, default=300.0, help="Gap (s) that starts a new session")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    paths = []
+    for path in args.logs:
+        rotated = rotated_log_files(path) if path.endswith((".tsv", ".bin")) else []
+        paths.extend(rotated or [path])
+
+    started = time.perf_counter()
+    results = asyncio.run(replay(args.strategy, paths, args.target, dict(args.param), args.band, args.max_gap))
+    elapsed = time.perf_counter() - started
+
+    total_duration = sum(r.duration for r in results)
+    for i, r in enumerate(results, 1):
+        print(f"session {i}: {r.samples} samples, {r.duration / 3600:.2f} h, "
+              f"switches {r.switches} (recorded {r.recorded_switches}), "
+              f"recorded session in band {r.recorded_in_band_ratio:.1%}, "
+              f"decision p50 {r.latency_percentile(0.5) * 1e6:.1f} µs / p99 {r.latency_percentile(0.99) * 1e6:.1f} µs")
+    if results:
+        print(f"replayed {total_duration / 3600:.2f} h of data in {elapsed:.2f} s "
+              f"({total_duration / max(elapsed, 1e-9):.0f}x real time)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# cooker/stall_watchdog.py
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class LoopStallWatchdog:
+    """
+    偵測 asyncio event loop 被同步呼叫卡住（例如 GPIO、TM1637 寫入、阻塞式 I/O），
+    並在卡住期間對 loop 執行緒做堆疊取樣。
+
+    - event loop 上以 call_later 週期性更新心跳時間
+    - 背景執行緒檢查心跳；超過 stall_threshold 沒有更新就視為卡住，
+      以 sample_interval 的頻率用 sys._current_frames() 取樣 loop 執行緒的堆疊
+    - 取樣結果彙整成 flame graph 的 collapsed/folded 格式（"f1;f2;f3 次數"），
+      可直接丟給 flamegraph.pl 或 speedscope
+
+    沒有卡住時心跳與背景執行緒仍以 stall_threshold / 4 的頻率醒來（預設 20 Hz），
+    會打斷閒置時的事件驅動等待，所以控制器只在舒肥機啟動期間執行（stop() 後完全不喚醒）。
+    """
+
+    def __init__(self, stall_threshold: float = 0.2, sample_interval: float = 0.005, max_stacks: int = 2000):
+        """
+        Args:
+            stall_threshold (float): 心跳延遲超過此秒數即視為卡住。
+            sample_interval (float): 卡住期間的堆疊取樣間隔（秒）。
+            max_stacks (int): 保留的不同堆疊數上限，超過的樣本歸入 "[other]"。
+        """
+        self.stall_threshold = stall_threshold
+        self.sample_interval = sample_interval
+        self.max_stacks = max_stacks
+        self._heartbeat_interval = stall_threshold / 4
+
+        self._lock = threading.Lock()
+        self._stacks: Counter[str] = Counter()
+        self.stall_count = 0
+        self.longest_stall = 0.0
+        self.sample_count = 0
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._last_beat = time.monotonic()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._beat_handle: asyncio.TimerHandle | None = None
+
+    def start(self):
+        """在 event loop 中呼叫；啟動心跳與監看執行緒，若已在執行則不做任何事。"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop_event.clear()  # 必須在 _beat() 之前：stop() 後事件仍為 set，_beat 就不會重新排程
+        self._beat()
+
+        self._thread = threading.Thread(target=self._run, name="LoopStallWatchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"LoopStallWatchdog started (threshold {self.stall_threshold * 1000:.0f} ms).")
+
+    def stop(self, timeout: float | None = 2.0):
+        """在 event loop 中呼叫；停止心跳與監看執行緒，之後可再 start()。"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        if self._beat_handle is not None:
+            self._beat_handle.cancel()
+            self._beat_handle = None
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info("LoopStallWatchdog stopped.")
+
+    def _beat(self):
+        self._last_beat = time.monotonic()
+        if not self._stop_event.is_set():
+            self._beat_handle = self._loop.call_later(self._heartbeat_interval, self._beat)
+
+    # --- watchdog thread --------------------------------------------------
+
+    def _run(self):
+        limit = self.stall_threshold + self._heartbeat_interval
+        while not self._stop_event.wait(self._heartbeat_interval):
+            if time.monotonic() - self._last_beat > limit:
+                self._record_stall(limit)
+
+    def _record_stall(self, limit: float):
+        """loop 卡住期間持續取樣，直到心跳恢復。"""
+        stall_start = self._last_beat
+        stacks: Counter[str] = Counter()
+        while time.monotonic() - self._last_beat > limit and not self._stop_event.is_set():
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                stacks[_collapse(frame)] += 1
+            del frame
+            self._stop_event.wait(self.sample_interval)
+
+        duration = time.monotonic() - stall_start
+        with self._lock:
+            self.stall_count += 1
+            self.longest_stall = max(self.longest_stall, duration)
+            self.sample_count += sum(stacks.values())
+            for stack, count in stacks.items():
+                if stack in self._stacks or len(self._stacks) < self.max_stacks:
+                    self._stacks[stack] += count
+                else:
+                    self._stacks["[other]"] += count
+
+        if stacks:
+            top = stacks.most_common(1)[0][0].rsplit(";", 1)[-1]
+            logger.warning(f"Event loop stalled for {duration * 1000:.0f} ms, mostly in {top}")
+        else:
+            logger.warning(f"Event loop stalled for {duration * 1000:.0f} ms")
+
+    # --- report -----------------------------------------------------------
+
+    def folded(self) -> str:
+        """回傳 flame graph 的 folded 格式：每行 "frame;frame;... 樣本數"。"""
+        with self._lock:
+            lines = [f"{stack} {count}" for stack, count in self._stacks.most_common()]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "stalls": self.stall_count,
+                "longest_stall": round(self.longest_stall, 4),
+                "samples": self.sample_count,
+                "distinct_stacks": len(self._stacks),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.stall_count = 0
+            self.longest_stall = 0.0
+            self.sample_count = 0
+
+
+def _collapse(frame) -> str:
+    """把 frame 鏈轉成由外到內、以分號分隔的字串。"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name}@{os.path.basename(code.co_filename)}:{frame.f_lineno}")
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
@@ -0,0 +1,11 @@
+# cooker/strategies.py
+from cooker.model_predictive_strategy import ModelPredictiveStrategy
+from cooker.simple_on_off_strategy import SimpleOnOffStrategy
+from cooker.two_phase_strategy import TwoPhaseStrategy
+
+# 策略名稱 → 類別；控制器、離線重播與基準測試共用
+STRATEGIES = {
+    "two_phase": TwoPhaseStrategy,
+    "simple_on_off": SimpleOnOffStrategy,
+    "model_predictive": ModelPredictiveStrategy,
+}
@@ -1,8 +1,21 @@
 # cooker/temp_control_strategy.py
 import abc
+import math
+from typing import Callable
 
 
 class TemperatureControlStrategy(abc.ABC):
+    _wakeup_callback: Callable[[float], None] | None = None
+
     @abc.abstractmethod
     async def decide_action(self, current_temperature: float, current_plug_is_on: bool) -> bool | None:
         pass
+
+    def set_wakeup_callback(self, callback: Callable[[float], None] | None):
+        """控制器注入的回呼，策略可藉由 request_wakeup() 要求提早重新評估。"""
+        self._wakeup_callback = callback
+
+    def request_wakeup(self, delay: float):
+        """要求在 delay 秒後再呼叫一次 decide_action；未注入回呼時（例如離線重播）不做任何事。"""
+        if self._wakeup_callback is not None and math.isfinite(delay):
+            self._wakeup_callback(delay)
@@ -0,0 +1,88 @@
+# cooker/thermal_plant.py
+"""
+批次水浴熱模型：以 NumPy 同步推進大量情境（每個情境一個陣列元素），供策略基準測試使用。
+
+每個情境的模型：
+    水溫   C·dT/dt = P·u(t − d) − k·(T − T_ambient)，C = 4186 J/(kg·K) × 水量（公升）
+    感測器 dS/dt = (T − S) / τ（探針外殼造成的量測延遲），讀值再量化到 DS18B20 的 0.0625°C
+    插座   指令延遲 d 秒後才真正切換 relay
+
+需要 numpy（只有開發 / 基準測試工具使用，控制器本身不依賴）。
+"""
+
+import numpy as np
+
+WATER_HEAT_CAPACITY = 4186.0  # J/(kg·K)，1 公升水約 1 kg
+DS18B20_RESOLUTION = 0.0625  # °C（12-bit）
+
+
+class BatchThermalPlant:
+    """
+    N 個獨立水浴的向量化模型。所有參數可為純量或長度 N 的陣列。
+    step() 以 commands（長度 N 的 bool 陣列，插座「被要求」的狀態）推進 dt 秒。
+    """
+
+    def __init__(self, volume, start_temperature, ambient, heater_power=1000.0, loss_coefficient=4.0,
+                 sensor_tau=15.0, plug_delay=1.0, dt=1.0, sensor_resolution=DS18B20_RESOLUTION,
+                 noise=0.0, seed=None):
+        """
+        Args:
+            volume: 水量（公升）。
+            start_temperature: 初始水溫與感測器溫度（°C）。
+            ambient: 環境溫度（°C）。
+            heater_power: 加熱功率（W）。
+            loss_coefficient: 散熱係數（W/K）。
+            sensor_tau: 感測器時間常數（秒）。
+            plug_delay: 插座切換延遲（秒），四捨五入到 dt 的整數倍。
+            dt: 每一步的秒數。
+            sensor_resolution: 讀值量化間距（°C），0 表示不量化。
+            noise: 讀值雜訊標準差（°C）。
+        """
+        arrays = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (
+            volume, start_temperature, ambient, heater_power, loss_coefficient, sensor_tau)))
+        volume, start_temperature, ambient, heater_power, loss_coefficient, sensor_tau = (
+            np.array(a, dtype=float).reshape(-1) for a in arrays)
+
+        self.size = volume.size
+        self.dt = dt
+        self.time = 0.0
+        self.heat_capacity = WATER_HEAT_CAPACITY * volume
+        self.ambient = ambient
+        self.heater_power = heater_power
+        self.loss_coefficient = loss_coefficient
+        self._sensor_alpha = 1.0 - np.exp(-dt / sensor_tau)
+        self._resolution = sensor_resolution
+        self._noise = noise
+        self._rng = np.random.default_rng(seed)
+
+        self.temperature = start_temperature.copy()
+        self.sensor = start_temperature.copy()
+        self.relay = np.zeros(self.size, dtype=bool)
+        self.switches = np.zeros(self.size, dtype=np.int64)
+
+        # 指令延遲：環形緩衝區保存最近 delay_steps 步的指令
+        delay_steps = max(0, int(round(plug_delay / dt)))
+        self._commands = np.zeros((delay_steps + 1, self.size), dtype=bool)
+        self._head = 0
+
+    def read_sensor(self) -> np.ndarray:
+        """回傳每個情境目前的溫度讀值（含量化與雜訊）。"""
+        reading = self.sensor
+        if self._noise > 0:
+            reading = reading + self._rng.normal(0.0, self._noise, self.size)
+        if self._resolution > 0:
+            reading = np.round(reading / self._resolution) * self._resolution
+        return reading
+
+    def step(self, commands: np.ndarray):
+        self._commands[self._head] = commands
+        self._head = (self._head + 1) % len(self._commands)
+        relay = self._commands[self._head]  # delay_steps 步之前的指令
+
+        self.switches += relay != self.relay
+        self.relay = relay.copy()
+
+        heat = np.where(self.relay, self.heater_power, 0.0) - self.loss_coefficient * (self.temperature - self.ambient)
+        self.temperature += heat * self.dt / self.heat_capacity
+        self.sensor += (self.temperature - self.sensor) * self._sensor_alpha
+        self.time += self.dt
@@ -0,0 +1,123 @@
+# cooker/tick_scheduler.py
+import asyncio
+import logging
+import math
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+def adaptive_interval(temperature: float | None, target: float, rate: float | None, near_interval: float,
+                      bulk_interval: float, near_band: float) -> float:
+    """
+    依熱狀態決定下一次 tick 的間隔：
+    - 距離目標 near_band 以內（或還沒有溫度）：near_interval，控制最緊
+    - 遠低於目標（大量加熱中）：bulk_interval，但依升溫速率估計進入 near_band 的時間，提前醒來
+    - 遠高於目標：bulk_interval，水溫只會慢慢降下來
+    """
+    if temperature is None:
+        return near_interval
+    error = target - temperature
+    if abs(error) <= near_band:
+        return near_interval
+    interval = bulk_interval
+    if error > 0 and rate is not None and rate > 0:
+        # 預計進入 near_band 所需時間的一半，避免在大間隔中衝過頭
+        interval = min(interval, (error - near_band) / rate / 2)
+    return max(near_interval, interval)
+
+
+class TickScheduler:
+    """
+    以絕對 deadline 排程控制迴圈的 tick：
+    - schedule(interval) 以上一個 deadline 為基準排下一個，不會因 tick 本身的耗時而漂移
+    - tick 做太久錯過下一個 deadline 時記一次 missed，並跳過已錯過的時間點而不是連續補跑
+    - request_wakeup(delay) 讓策略 / 控制器要求提早醒來（例如加熱脈衝結束時）
+    - wake() 立即醒來（開關、按鈕、設定檔變更等事件）
+
+    wait() 與 wake() / request_wakeup() 都必須在 event loop 中呼叫；其他執行緒請用 call_soon_threadsafe。
+    """
+
+    def __init__(self, metrics=None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            metrics: 可選的 TickMetrics，記錄 deadline 的延遲（stage "tick_lateness"）與錯過次數。
+            clock: 時間來源，需與 event loop 的時間相同（預設 time.monotonic）。
+        """
+        self._clock = clock
+        self._metrics = metrics
+        self._changed = asyncio.Event()
+        self._wake_requested = False
+
+        self._cadence_deadline: float | None = None  # 依 interval 排定的下一次 tick
+        self._requested_deadline: float | None = None  # request_wakeup 要求的最早時間
+        self._tick_started: float | None = None
+        self._on_cadence = False  # 這次 tick 是否由 cadence deadline 觸發
+
+        self.interval: float | None = None
+        self.missed = 0  # 累計錯過的 deadline 次數
+        self.max_lateness = 0.0  # 醒來時間比 deadline 晚最多的秒數
+
+    @property
+    def deadline(self) -> float | None:
+        deadlines = [d for d in (self._cadence_deadline, self._requested_deadline) if d is not None]
+        return min(deadlines) if deadlines else None
+
+    def schedule(self, interval: float):
+        """tick 結束後呼叫，以 interval 排定下一個 deadline。"""
+        now = self._clock()
+        base = now if self._tick_started is None else self._tick_started
+        if self._on_cadence and self._cadence_deadline is not None:
+            base = self._cadence_deadline  # 以 deadline 而非實際醒來時間為基準，避免漂移
+        next_deadline = base + interval
+        if next_deadline <= now:
+            skipped = math.floor((now - base) / interval)
+            self.missed += 1
+            if self._metrics is not None:
+                self._metrics.increment("tick_deadline_missed_total")
+            logger.warning("Tick overran its deadline by %.3fs (interval %.2fs), skipping %d slot(s)",
+                           now - next_deadline, interval, skipped)
+            next_deadline = base + interval * (skipped + 1)
+        self.interval = interval
+        self._cadence_deadline = next_deadline
+
+    def request_wakeup(self, delay: float):
+        """要求最晚在 delay 秒後 tick 一次；只會讓 deadline 提前，不會延後。"""
+        deadline = self._clock() + max(0.0, delay)
+        if self._requested_deadline is None or deadline < self._requested_deadline:
+            self._requested_deadline = deadline
+            logger.debug("Wake-up requested in %.2fs", delay)
+            self._changed.set()
+
+    def wake(self):
+        """立即醒來執行下一次 tick。"""
+        self._wake_requested = True
+        self._changed.set()
+
+    async def wait(self):
+        """等到下一個 deadline、request_wakeup 的時間或 wake()。"""
+        while not self._wake_requested:
+            deadline = self.deadline
+            now = self._clock()
+            if deadline is not None and now >= deadline:
+                lateness = now - deadline
+                self.max_lateness = max(self.max_lateness, lateness)
+                if self._metrics is not None:
+                    self._metrics.observe("tick_lateness", lateness)
+                self._on_cadence = deadline == self._cadence_deadline
+                if self._requested_deadline is not None and self._requested_deadline <= now:
+                    self._requested_deadline = None
+                self._tick_started = now
+                return
+            self._changed.clear()
+            timeout = None if deadline is None else deadline - now
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._wake_requested = False
+        self._on_cadence = False
+        self._tick_started = self._clock()
+        if self._requested_deadline is not None and self._requested_deadline <= self._tick_started:
+            self._requested_deadline = None
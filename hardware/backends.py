@@ -0,0 +1,66 @@
+# hardware/backends.py
+
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 裝置種類 -> {後端名稱: "模組:類別"}。只有被選用的後端才會 import，
+# 因此在沒有 gpiozero / tm1637 / python-kasa 的機器上也能使用模擬後端。
+BACKENDS: dict[str, dict[str, str]] = {
+    "thermometer": {
+        "ds18b20": "hardware.thermometer:Thermometer",
+        "multi_probe": "hardware.multi_probe_thermometer:MultiProbeThermometer",
+        "dummy": "hardware.thermometer:DummyThermometer",
+        "simulated": "hardware.simulated:SimulatedThermometer",
+    },
+    "switch": {
+        "gpio": "hardware.switch:SwitchInputManager",
+        "simulated": "hardware.simulated:SimulatedSwitch",
+    },
+    "temp_buttons": {
+        "gpio": "hardware.temp_button_manager:TempButtonManager",
+        "simulated": "hardware.simulated:SimulatedTempButtons",
+    },
+    "display": {
+        "tm1637": "hardware.display:DisplayManager",
+        "simulated": "hardware.simulated:SimulatedDisplay",
+    },
+    "led": {
+        "gpio": "hardware.power_led:PowerLED",
+        "simulated": "hardware.simulated:SimulatedLED",
+    },
+    "plug": {
+        "kasa": "hardware.raw_kasa_client:RawKasaClient",
+        "simulated": "hardware.simulated:SimulatedPlug",
+    },
+}
+
+_loaded: dict[tuple[str, str], type] = {}
+
+
+def register_backend(kind: str, name: str, target: str):
+    """註冊（或覆蓋）一個後端；target 格式為 "模組:類別"。"""
+    BACKENDS.setdefault(kind, {})[name] = target
+    _loaded.pop((kind, name), None)
+
+
+def load_backend(kind: str, name: str) -> type:
+    """回傳後端類別，第一次使用時才 import 對應模組。"""
+    cls = _loaded.get((kind, name))
+    if cls is not None:
+        return cls
+    try:
+        target = BACKENDS[kind][name]
+    except KeyError:
+        available = ", ".join(sorted(BACKENDS.get(kind, {})))
+        raise ValueError(f"Unknown {kind} backend '{name}' (available: {available})") from None
+    module_name, _, attr = target.partition(":")
+    cls = getattr(importlib.import_module(module_name), attr)
+    _loaded[(kind, name)] = cls
+    logger.debug("Loaded %s backend '%s' from %s", kind, name, target)
+    return cls
+
+
+def create_backend(kind: str, name: str, *args, **kwargs):
+    return load_backend(kind, name)(*args, **kwargs)
@@ -5,13 +5,13 @@ import tm1637
 from config.config_manager import ConfigManager
 
 logger = logging.getLogger(__name__)
-cfg = ConfigManager()
 
 
 class DisplayManager:
     def __init__(self):
-        clk_pin = cfg.get_int("display_clk_pin", default=27)
-        dio_pin = cfg.get_int("display_dio_pin", default=22)
+        gpio = ConfigManager().snapshot.gpio
+        clk_pin = gpio.display_clk_pin
+        dio_pin = gpio.display_dio_pin
 
         # 明確指定 gpiochip，根據你環境是 /dev/gpiochip4
         self.display = tm1637.TM1637(clk=clk_pin, dio=dio_pin, chip_path="/dev/gpiochip4")
@@ -19,7 +19,7 @@ class DisplayManager:
         logger.debug(f"TM1637 initialized on CLK={clk_pin}, DIO={dio_pin}")
 
     def show_temperature(self, temp_c: float):
-        logger.debug(f"Displaying temperature: {temp_c}°C")
+        logger.debug("Displaying temperature: %s°C", temp_c)
         """顯示攝氏溫度（支援小數點，0~99.9°C）"""
         try:
             if 0.0 <= temp_c < 100.0:
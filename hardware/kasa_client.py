@@ -3,7 +3,10 @@
 import asyncio
 import logging
 import time
-from hardware.raw_kasa_client import RawKasaClient
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from hardware.raw_kasa_client import RawKasaClient
 
 logger = logging.getLogger(__name__)
 
@@ -12,86 +15,136 @@ class KasaClient:
     """
     用於控制 TP-Link Kasa 智慧插座的 Class。
     內部維護目標狀態，並在背景任務中按步調執行操作，包含頻率限制。
+    背景任務由新的意圖事件驅動，狀態確認則採自適應退避輪詢。
     不直接與 Kasa API 交互，而是透過 KasaDeviceClient。
     """
 
-    def __init__(self, min_op_interval: float = 1.0, update_interval: float = 1.0):
+    def __init__(self, min_op_interval: float = 1.0, update_interval: float = 1.0, max_poll_interval: float = 10.0,
+                 device_client: "RawKasaClient | None" = None):
         """
         初始化 KasaSmartPlug。
 
         Args:
             min_op_interval (float): 最小操作間隔 (秒)，避免頻繁開關。
-            update_interval (float): 背景任務更新頻率 (秒)。
+            update_interval (float): 切換後狀態確認的最短輪詢間隔 (秒)。
+            max_poll_interval (float): 穩定狀態下的最長輪詢間隔 (秒)。
+            device_client (RawKasaClient): 實際與設備通訊的 client，預設依 config.yaml 建立。
         """
         # 不再接收 ip_address 參數
-        self._device_client = RawKasaClient()
+        if device_client is None:
+            from hardware.raw_kasa_client import RawKasaClient  # python-kasa 只在實際使用時載入
+            device_client = RawKasaClient()
+        self._device_client = device_client
         self._min_op_interval = min_op_interval
-        self._last_op_time = 0.0
+        self._last_op_time = float("-inf")
 
         self._pending_state: bool | None = None
         self._current_physical_state: bool | None = None
 
-        self._update_interval = update_interval
+        # 自適應輪詢：切換後用最短間隔確認，之後每次加倍直到最長間隔
+        self._min_poll_interval = update_interval
+        self._max_poll_interval = max_poll_interval
+        self._poll_interval = update_interval
+        self._next_poll_time = float("-inf")
+        self._retry_after = float("-inf")  # 通訊失敗後，在此時間之前不重試操作
+        self._wakeup = asyncio.Event()  # 有新的意圖時喚醒背景任務
 
         self._updater_is_running = False
         self._state_updater_task = None
-        #self._state_updater_task = asyncio.create_task(self._run_state_updater())
         # 日誌訊息中不再包含 IP，因為 KasaSmartPlug 不關心它了
         logger.info(f"KasaSmartPlug initialized. Min operation interval: {min_op_interval}s")
 
+    def _reset_poll_interval(self, now: float):
+        self._poll_interval = self._min_poll_interval
+        self._next_poll_time = now + self._poll_interval
+
+    def _back_off_poll_interval(self, now: float):
+        self._poll_interval = min(self._poll_interval * 2, self._max_poll_interval)
+        self._next_poll_time = now + self._poll_interval
+
+    def _next_op_time(self) -> float:
+        return max(self._last_op_time + self._min_op_interval, self._retry_after)
+
+    async def _refresh_state(self, now: float):
+        """向裝置確認實際狀態；狀態與預期不同時回到快速輪詢。"""
+        previous = self._current_physical_state
+        self._current_physical_state = await self._device_client.is_on()
+        if self._current_physical_state != previous:
+            logger.info(f"KasaSmartPlug: Physical state changed to {self._current_physical_state}.")
+            self._reset_poll_interval(now)
+        else:
+            self._back_off_poll_interval(now)
+
+    async def _execute_pending(self, now: float):
+        if self._pending_state:
+            logger.info("KasaSmartPlug: Executing scheduled turn_on.")
+            new_state = await self._device_client.turn_on()
+        else:
+            logger.info("KasaSmartPlug: Executing scheduled turn_off.")
+            new_state = await self._device_client.turn_off()
+
+        self._last_op_time = now
+        # 指令的回應已帶回新的實際狀態；若與意圖不同，保留 pending 讓下一輪重試
+        self._current_physical_state = new_state
+        if new_state == self._pending_state:
+            self._pending_state = None  # 清除待處理狀態
+        self._reset_poll_interval(now)  # 切換後盡快確認狀態
+
     async def _run_state_updater(self):
-        loop = asyncio.get_running_loop()
-        logger.info("跑起來！")
         """
         在背景持續運行，負責檢查狀態、執行插座操作並處理頻率限制。
+        有新的意圖時立即被喚醒（仍遵守 min_op_interval）；沒有事情時依自適應間隔輪詢狀態。
         """
+        loop = asyncio.get_running_loop()
+        logger.info("KasaSmartPlug: State updater task started.")
         while True:
-            logger.info("KasaSmartPlug: Running state updater task.")
+            now = loop.time()
             try:
-                # 獲取當前實際的物理狀態
-                # 這裡依賴 _KasaDeviceClient 處理連接狀態和錯誤
-                self._current_physical_state = await self._device_client.is_on()
+                if self._pending_state is not None and self._pending_state == self._current_physical_state:
+                    # 如果待處理狀態與當前物理狀態一致，則不需要執行操作
+                    logger.debug("KasaSmartPlug: No action needed. Current state is %s.", self._current_physical_state)
+                    self._pending_state = None
 
                 if self._pending_state is not None:
-                    if self._pending_state == self._current_physical_state:
-                        # 如果待處理狀態與當前物理狀態一致，則不需要執行操作
-                        logger.debug(f"KasaSmartPlug: No action needed. Current state is {self._current_physical_state}.")
-                        self._pending_state = None
+                    if now >= self._next_op_time():
+                        await self._execute_pending(now)
                     else:
-                        # 如果有待處理的狀態，且與當前物理狀態不一致，則執行操作
-                        current_time = loop.time()  # todo
-                        if current_time - self._last_op_time >= self._min_op_interval:
-                            if self._pending_state:
-                                logger.info(f"KasaSmartPlug: Executing scheduled turn_on.")
-                                await self._device_client.turn_on()
-                            else:
-                                logger.info(f"KasaSmartPlug: Executing scheduled turn_off.")
-                                await self._device_client.turn_off()
-
-                            self._last_op_time = current_time  # todo
-                            self._current_physical_state = self._pending_state
-                            self._pending_state = None  # 清除待處理狀態
-                        else:
-                            logger.debug(
-                                f"KasaSmartPlug: Waiting {self._min_op_interval - (current_time - self._last_op_time):.1f}s before executing {self._pending_state}.")
+                        logger.debug("KasaSmartPlug: Waiting %.1fs before executing %s.",
+                                     self._next_op_time() - now, self._pending_state)
+                elif now >= self._next_poll_time:
+                    # 獲取當前實際的物理狀態
+                    # 這裡依賴 _KasaDeviceClient 處理連接狀態和錯誤
+                    await self._refresh_state(now)
 
             except ConnectionError:
                 logger.warning("KasaSmartPlug: Device client not connected. Retrying connection in background.")
                 self._current_physical_state = None  # 連接問題導致狀態未知
+                self._back_off_poll_interval(now)
+                self._retry_after = self._next_poll_time
                 # KasaDeviceClient 內部會處理連接重試，這裡只要等待即可
             except Exception as e:
                 logger.error(f"Error in KasaSmartPlug state updater: {e}", exc_info=True)
                 self._current_physical_state = None
-
-            logger.debug("Finished state update cycle.")
-            await asyncio.sleep(self._update_interval)
+                self._back_off_poll_interval(now)
+                self._retry_after = self._next_poll_time
+
+            # 睡到下一次輪詢，或下一次允許操作的時間，或被新的意圖喚醒
+            now = loop.time()
+            timeout = self._next_poll_time - now
+            if self._pending_state is not None:
+                timeout = min(timeout, self._next_op_time() - now)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0.0, timeout))
+            except asyncio.TimeoutError:
+                pass
 
     async def turn_on(self) -> bool:
         """
         設定智慧插座的目標狀態為開啟。此操作非阻塞，只是設定意圖。
         """
         if self._pending_state == True:
-            logger.debug(f"KasaSmartPlug: Already intended ON. No change.")
+            logger.debug("KasaSmartPlug: Already intended ON. No change.")
             return
 
         if self._pending_state == False:
@@ -99,14 +152,15 @@ class KasaClient:
                 f"KasaSmartPlug: Conflicting command received. Intended OFF, now setting to ON.")
 
         self._pending_state = True
-        logger.info(f"KasaSmartPlug: Enqueued turn_on. Background task will handle execution.")
+        self._wakeup.set()
+        logger.info("KasaSmartPlug: Enqueued turn_on. Background task will handle execution.")
 
     async def turn_off(self) -> bool:
         """
         設定智慧插座的目標狀態為關閉。此操作非阻塞，只是設定意圖。
         """
         if self._pending_state == False:
-            logger.debug(f"KasaSmartPlug: Already intended OFF. No change.")
+            logger.debug("KasaSmartPlug: Already intended OFF. No change.")
             return
 
         if self._pending_state == True:
@@ -114,7 +168,8 @@ class KasaClient:
                 f"KasaSmartPlug: Conflicting command received. Intended ON, now setting to OFF.")
 
         self._pending_state = False
-        logger.info(f"KasaSmartPlug: Enqueued turn_off. Background task will handle execution.")
+        self._wakeup.set()
+        logger.info("KasaSmartPlug: Enqueued turn_off. Background task will handle execution.")
 
     def is_on(self) -> bool | None:
         """
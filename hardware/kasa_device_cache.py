@@ -0,0 +1,48 @@
+# hardware/kasa_device_cache.py
+
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class KasaDeviceCache:
+    """
+    把上次成功連線的 Kasa 裝置資訊存到磁碟（JSON），下次啟動或重連時可直接連線，
+    不必再做數秒的 UDP 廣播探索。
+
+    內容：host、device_type、child_alias，以及 python-kasa 的 DeviceConfig（不含帳密）。
+    """
+
+    def __init__(self, path: str = "cache/kasa_device.json"):
+        self.path = path
+
+    def load(self) -> dict | None:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"KasaDeviceCache: Ignoring unreadable cache {self.path}: {e}")
+            return None
+        if not isinstance(data, dict) or "host" not in data:
+            return None
+        return data
+
+    def save(self, data: dict):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)  # 原子替換，避免寫到一半斷電留下壞檔
+        except Exception as e:
+            logger.warning(f"KasaDeviceCache: Failed to save cache {self.path}: {e}")
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
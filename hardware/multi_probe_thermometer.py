@@ -0,0 +1,113 @@
+# hardware/multi_probe_thermometer.py
+
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from hardware.thermometer import Thermometer
+from model.temperature_history import TemperatureHistory
+
+logger = logging.getLogger(__name__)
+
+
+class MultiProbeThermometer:
+    """
+    同時讀取所有已掛載的 DS18B20 探針，並依照設定的策略彙整成單一溫度。
+    每支探針在獨立的執行緒中讀取，N 支探針只需花費約一次轉換時間。
+
+    彙整策略（aggregation）：
+    - mean     : 平均值
+    - median   : 中位數
+    - min / max: 最低 / 最高值
+    - trimmed  : 先剔除與中位數相差超過 outlier_threshold 的探針，再取平均
+    """
+    AGGREGATIONS = ("mean", "median", "min", "max", "trimmed")
+
+    def __init__(self, aggregation: str = "median", outlier_threshold: float = 1.0, max_workers: int = 4,
+                 resolution: int | None = None):
+        if aggregation not in self.AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation '{aggregation}', expected one of {self.AGGREGATIONS}")
+        self.aggregation = aggregation
+        self.outlier_threshold = outlier_threshold
+        self._max_workers = max_workers
+        self._resolution = resolution  # 每支探針的轉換解析度（9~12 bit），None 表示不變更
+
+        self._probes: list[Thermometer] | None = None  # lazy init
+        self._executor: ThreadPoolExecutor | None = None
+        self._last_temperature = None
+        self._history = TemperatureHistory(capacity=3600)
+        logger.debug(f"MultiProbeThermometer initialized (aggregation={aggregation})")
+
+    def _ensure_probes(self) -> list[Thermometer]:
+        if self._probes is None:
+            device_files = Thermometer.find_device_files()
+            self._probes = [Thermometer(device_file, resolution=self._resolution) for device_file in device_files]
+            self._executor = ThreadPoolExecutor(
+                max_workers=min(self._max_workers, len(self._probes)),
+                thread_name_prefix="probe",
+            )
+            logger.info(f"MultiProbeThermometer found {len(self._probes)} probes: "
+                        f"{[p.probe_id for p in self._probes]}")
+        return self._probes
+
+    def _aggregate(self, readings: list[float]) -> float:
+        if self.aggregation == "mean":
+            return statistics.fmean(readings)
+        if self.aggregation == "median":
+            return statistics.median(readings)
+        if self.aggregation == "min":
+            return min(readings)
+        if self.aggregation == "max":
+            return max(readings)
+
+        # trimmed：剔除離群探針後取平均
+        median = statistics.median(readings)
+        kept = [r for r in readings if abs(r - median) <= self.outlier_threshold]
+        if len(kept) < len(readings):
+            logger.warning(f"Dropped {len(readings) - len(kept)} outlier probe reading(s) around median {median:.2f}°C")
+        return statistics.fmean(kept) if kept else median
+
+    def read_temperature(self) -> float:
+        probes = self._ensure_probes()
+        futures = [self._executor.submit(probe.read_temperature) for probe in probes]
+
+        readings = []
+        for probe, future in zip(probes, futures):
+            try:
+                readings.append(future.result())
+            except Exception as e:
+                logger.warning(f"Probe {probe.probe_id} failed: {e}")
+
+        if not readings:
+            raise RuntimeError("All temperature probes failed")
+
+        temperature = self._aggregate(readings)
+        self._last_temperature = temperature
+        self._history.append(time.time(), temperature)
+        return round(temperature, 2)
+
+    def get_last_temperature(self) -> float | None:
+        return self._last_temperature
+
+    def get_history(self):
+        """
+        回傳彙整後的 list，每筆是 (timestamp, temperature)
+        """
+        return [(ts, temp) for ts, temp, _ in self._history.to_list()]
+
+    def get_probe_temperatures(self) -> dict[str, float | None]:
+        """回傳 {probe_id: 最後讀值}。"""
+        if self._probes is None:
+            return {}
+        return {p.probe_id: p.get_last_temperature() for p in self._probes}
+
+    def get_probe_histories(self) -> dict[str, list]:
+        """回傳 {probe_id: [(timestamp, temperature), ...]}。"""
+        if self._probes is None:
+            return {}
+        return {p.probe_id: p.get_history() for p in self._probes}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
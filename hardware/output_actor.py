@@ -0,0 +1,150 @@
+# hardware/output_actor.py
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class OutputActor:
+    """
+    在獨立執行緒中擁有 TM1637 顯示器與電源指示燈，控制迴圈只投遞「想要的畫面」，不會卡在 GPIO 寫入上。
+
+    - 每個輸出只保留最新的要求（coalesce），中間被覆蓋的畫面直接丟棄
+    - 與上次實際寫出的畫面相同時不寫入（顯示器以 0.1°C 為單位比較）
+    - 顯示器兩次寫入之間至少間隔 min_display_interval 秒
+    """
+
+    def __init__(self, display, power_led, min_display_interval: float = 0.2, metrics=None):
+        """
+        Args:
+            display: DisplayManager。
+            power_led: PowerLED。
+            min_display_interval (float): 顯示器寫入的最小間隔（秒）。
+            metrics: 可選的 TickMetrics，記錄實際寫入顯示器 / LED 的耗時。
+        """
+        self._display = display
+        self._power_led = power_led
+        self._min_display_interval = min_display_interval
+        self._metrics = metrics
+
+        self._condition = threading.Condition()
+        self._display_frame: tuple | None = None  # 想要的畫面
+        self._led_mode: str | None = None  # "on" / "off" / "blink"
+        self._written_frame: tuple | None = None  # 最後實際寫出的畫面
+        self._written_led_mode: str | None = None
+        self._last_display_write = float("-inf")
+        self.writes = 0
+        self.skipped = 0  # 與目前畫面相同而省略的要求次數
+
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        """啟動輸出執行緒；若已在執行則不做任何事。"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="OutputActor", daemon=True)
+        self._thread.start()
+        logger.info("OutputActor started.")
+
+    def stop(self, timeout: float | None = 2.0):
+        """寫出尚未處理的畫面後停止執行緒。"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # --- 控制迴圈呼叫（不阻塞） --------------------------------------------
+
+    def show_temperature(self, temp_c: float):
+        self._set_frame(("temperature", round(temp_c, 1)))
+
+    def show_text(self, text: str):
+        self._set_frame(("text", text[:4]))
+
+    def clear(self):
+        self._set_frame(("clear",))
+
+    def set_heating(self, heating: bool):
+        """加熱中恆亮，否則閃爍（與 PowerLED.set_heating 相同語意）。"""
+        self._set_led("on" if heating else "blink")
+
+    def led_off(self):
+        self._set_led("off")
+
+    def _set_frame(self, frame: tuple):
+        with self._condition:
+            if frame != self._display_frame:
+                self._display_frame = frame
+                self._condition.notify()
+            else:
+                self.skipped += 1
+
+    def _set_led(self, mode: str):
+        with self._condition:
+            if mode != self._led_mode:
+                self._led_mode = mode
+                self._condition.notify()
+            else:
+                self.skipped += 1
+
+    # --- 輸出執行緒 ---------------------------------------------------------
+
+    def _pending(self) -> bool:
+        return self._display_frame != self._written_frame or self._led_mode != self._written_led_mode
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending() and not self._stopping:
+                    self._condition.wait()
+                if self._stopping and not self._pending():
+                    return
+                led_mode = self._led_mode
+                frame = self._display_frame
+
+            if led_mode != self._written_led_mode:
+                self._timed("led_write", self._write_led, led_mode)
+                self._written_led_mode = led_mode
+
+            if frame != self._written_frame:
+                wait = self._last_display_write + self._min_display_interval - time.monotonic()
+                if wait > 0 and not self._stopping:
+                    # 等待期間的新畫面會覆蓋這一張，醒來後只寫最新的
+                    time.sleep(wait)
+                    continue
+                self._timed("display_write", self._write_frame, frame)
+                self._written_frame = frame
+                self._last_display_write = time.monotonic()
+
+    def _timed(self, stage: str, write, value):
+        started = time.perf_counter()
+        try:
+            write(value)
+            self.writes += 1
+        except Exception as e:
+            logger.error(f"OutputActor: Failed to write {value}: {e}")
+        if self._metrics is not None:
+            self._metrics.observe(stage, time.perf_counter() - started)
+
+    def _write_frame(self, frame: tuple):
+        kind = frame[0]
+        if kind == "temperature":
+            self._display.show_temperature(frame[1])
+        elif kind == "text":
+            self._display.show_text(frame[1])
+        else:
+            self._display.clear()
+
+    def _write_led(self, mode: str):
+        if mode == "on":
+            self._power_led.turn_on()
+        elif mode == "blink":
+            self._power_led.set_heating(False)
+        else:
+            self._power_led.turn_off()
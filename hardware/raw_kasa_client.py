@@ -1,57 +1,154 @@
 # hardware/raw_kasa_client.py
 import logging
+import time
+from collections import deque
 
-from kasa import Discover
+from kasa import Device, DeviceConfig, Discover
+
+from config.config_manager import ConfigManager
+from hardware.kasa_device_cache import KasaDeviceCache
 
 logger = logging.getLogger(__name__)
 
 
 class RawKasaClient:
-    def __init__(self):
+    def __init__(self, cache_path: str | None = None, discovery_target: str | None = None,
+                 port: int | None = None, discovery_timeout: float | None = None):
         """
         初始化 KasaDeviceClient，負責與 Kasa 設備進行通信。
-        這裡不需要 IP 地址，因為 Discover 將自動尋找設備。
+        這裡不需要 IP 地址：優先用快取中的 host 直接連線，失敗才用 Discover 廣播尋找設備。
+        未指定的參數從 config.yaml 的 kasa 區段讀取。
         """
         self._plug = None
         self._strip = None
+        self._request_latencies = deque(maxlen=200)  # (command, 秒)，最近的請求耗時
+        kasa = ConfigManager().snapshot.kasa
+        self._cache = KasaDeviceCache(cache_path or kasa.cache_path)
+        self._discovery_target = discovery_target or kasa.discovery_target
+        self._port = port or kasa.port  # None 表示使用 Kasa 預設埠
+        self._discovery_timeout = discovery_timeout or kasa.discovery_timeout
 
     _PLUG_ID = 0
 
+    def _select_plug(self, strip, child_alias: str | None = None):
+        if child_alias:
+            for child in strip.children:
+                if child.alias == child_alias:
+                    return child
+            logger.warning(f"KasaDeviceClient: Cached child '{child_alias}' not found, using socket {self._PLUG_ID}")
+        return strip.children[self._PLUG_ID]
+
+    async def _connect_cached(self):
+        """用快取的連線設定直接連到裝置（一次 round trip），失敗回傳 None。"""
+        cached = self._cache.load()
+        if cached is None or "config" not in cached:
+            return None
+        try:
+            strip = await Device.connect(config=DeviceConfig.from_dict(cached["config"]))
+            plug = self._select_plug(strip, cached.get("child_alias"))
+            logger.info(f"KasaDeviceClient: Connected to cached device at {cached['host']}")
+            return strip, plug
+        except Exception as e:
+            logger.warning(f"KasaDeviceClient: Cached host {cached.get('host')} unreachable ({e}), falling back to discovery")
+            return None
+
+    async def _discover(self):
+        all_devices = await Discover.discover(
+            target=self._discovery_target, port=self._port, discovery_timeout=self._discovery_timeout)
+        strip = list(all_devices.values())[0]
+        await strip.update()
+        plug = self._select_plug(strip)
+        self._cache.save({
+            "host": strip.host,
+            "device_type": str(strip.device_type),
+            "child_alias": plug.alias,
+            "config": strip.config.to_dict(exclude_credentials=True),
+        })
+        logger.info(f"KasaDeviceClient: Discovered device at {strip.host}, cached for next start")
+        return strip, plug
+
     async def _get_device(self):
         try:
             if self._plug is None or self._strip is None:
-                all_devices = await Discover.discover()
-                self._strip = list(all_devices.values())[0]
-                await self._strip.update()
-                self._plug = self._strip.children[self._PLUG_ID]
+                connected = await self._connect_cached()
+                if connected is None:
+                    connected = await self._discover()
+                self._strip, self._plug = connected
             return self._strip, self._plug
         except:
             self._plug, self._strip = None, None
             logger.error(f"KasaDeviceClient: Failed to discover kasa device")
             raise ConnectionError(f"KasaDeviceClient failed to connect")
 
-    async def turn_on(self):
-        """實際發送開啟指令給 Kasa 設備，並更新其狀態。"""
-        try:
-            strip, plug = await self._get_device()
-            await plug.turn_on()
-            await strip.update()
-        except:
-            raise ConnectionError("KasaDeviceClient failed to connect")
+    def _reset(self):
+        """通訊失敗後丟掉連線，下次呼叫會先嘗試快取的 host 重連。"""
+        self._plug, self._strip = None, None
+
+    async def close(self):
+        """關閉與設備的連線。"""
+        if self._strip is not None:
+            await self._strip.disconnect()
+        self._reset()
 
-    async def turn_off(self):
-        """實際發送關閉指令給 Kasa 設備，並更新其狀態。"""
+    def _child_id(self, plug) -> str:
+        return getattr(plug, "child_id", None) or plug.device_id
+
+    async def _query_child(self, command: str, commands: dict) -> dict:
+        """
+        以單一請求對受控插孔送出 system 模組的指令（可同時包含多個指令），
+        並記錄這次請求的耗時。回傳 system 模組的回應。
+        """
+        strip, plug = await self._get_device()
+        request = {"context": {"child_ids": [self._child_id(plug)]}, "system": commands}
+        started = time.perf_counter()
+        response = await strip.protocol.query(request)
+        latency = time.perf_counter() - started
+        self._request_latencies.append((command, latency))
+        logger.debug("KasaDeviceClient: %s took %.1f ms", command, latency * 1000)
+
+        system = response.get("system", {})
+        for name in commands:
+            result = system.get(name)
+            if not isinstance(result, dict) or result.get("err_code", 0) != 0:
+                raise ConnectionError(f"KasaDeviceClient: {name} failed: {result}")
+        return system
+
+    def _child_state(self, sys_info: dict) -> bool:
+        """從 get_sysinfo 回應中取出受控插孔的 relay 狀態。"""
+        child_id = self._child_id(self._plug)
+        for child in sys_info.get("children", []):
+            # 有些韌體回傳完整 ID（deviceId + 序號），有些只回傳序號
+            if child.get("id") and child_id.endswith(child["id"]):
+                return bool(child["state"])
+        raise ConnectionError(f"KasaDeviceClient: Child {child_id} missing from sysinfo")
+
+    async def _set_relay(self, on: bool) -> bool:
+        """一次 round trip：切換 relay 並在同一個請求中取回新的插孔狀態。"""
+        command = "turn_on" if on else "turn_off"
         try:
-            strip, plug = await self._get_device()
-            await plug.turn_off()
-            await strip.update()
+            system = await self._query_child(command, {"set_relay_state": {"state": int(on)}, "get_sysinfo": {}})
+            return self._child_state(system["get_sysinfo"])
         except:
+            self._reset()
             raise ConnectionError("KasaDeviceClient failed to connect")
 
+    async def turn_on(self) -> bool:
+        """實際發送開啟指令給 Kasa 設備，回傳指令後的實際狀態。"""
+        return await self._set_relay(True)
+
+    async def turn_off(self) -> bool:
+        """實際發送關閉指令給 Kasa 設備，回傳指令後的實際狀態。"""
+        return await self._set_relay(False)
+
     async def is_on(self) -> bool | None:
-        """檢查 Kasa 設備是否開啟，返回布林值或 None。"""
+        """向裝置查詢受控插孔目前是否開啟（每次都是新的狀態，不使用快取）。"""
         try:
-            strip, plug = await self._get_device()
-            return plug.is_on
+            system = await self._query_child("is_on", {"get_sysinfo": {}})
+            return self._child_state(system["get_sysinfo"])
         except:
+            self._reset()
             raise ConnectionError("KasaDeviceClient failed to connect")
+
+    def get_request_latencies(self) -> list[tuple[str, float]]:
+        """回傳最近請求的 (command, 秒) 紀錄。"""
+        return list(self._request_latencies)
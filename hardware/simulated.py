@@ -0,0 +1,177 @@
+# hardware/simulated.py
+
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from config.config_manager import ConfigManager
+from hardware.thermometer import DummyThermometer
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatedWaterBath:
+    """
+    極簡的水浴熱模型：dT/dt = heater_rate·u − loss_rate·(T − ambient)。
+    以實際經過的時間推進（解析解，不受呼叫頻率影響），模擬插座與溫度計共用同一個實例。
+    """
+
+    def __init__(self, ambient: float = 25.0, heater_rate: float = 0.05, loss_rate: float = 0.001,
+                 noise: float = 0.05, clock: Callable[[], float] = time.monotonic):
+        self.ambient = ambient
+        self.heater_rate = heater_rate  # 加熱時每秒升溫（°C/s，不計散熱）
+        self.loss_rate = loss_rate  # 每秒散失與環境溫差的比例
+        self.noise = noise
+        self.temperature = ambient
+        self.heating = False
+        self._clock = clock
+        self._last_update = clock()
+        self._lock = threading.Lock()
+
+    def _advance(self):
+        now = self._clock()
+        dt = now - self._last_update
+        self._last_update = now
+        equilibrium = self.ambient + (self.heater_rate / self.loss_rate if self.heating else 0.0)
+        self.temperature = equilibrium + (self.temperature - equilibrium) * math.exp(-self.loss_rate * dt)
+
+    def set_heating(self, heating: bool):
+        with self._lock:
+            self._advance()
+            self.heating = heating
+
+    def read(self) -> float:
+        with self._lock:
+            self._advance()
+            return self.temperature + random.gauss(0.0, self.noise)
+
+
+_water_bath: SimulatedWaterBath | None = None
+_water_bath_lock = threading.Lock()
+
+
+def water_bath() -> SimulatedWaterBath:
+    """模擬後端共用的水浴（依 config.yaml 的 simulation 區段建立）。"""
+    global _water_bath
+    with _water_bath_lock:
+        if _water_bath is None:
+            sim = ConfigManager().snapshot.simulation
+            _water_bath = SimulatedWaterBath(ambient=sim.ambient_temperature, heater_rate=sim.heater_rate,
+                                             loss_rate=sim.loss_rate, noise=sim.noise)
+        return _water_bath
+
+
+class SimulatedThermometer(DummyThermometer):
+    """讀取模擬水浴的溫度計，溫度隨模擬插座的開關而升降。"""
+
+    def __init__(self):
+        super().__init__(source=water_bath().read,
+                         conversion_time=ConfigManager().snapshot.simulation.conversion_time)
+
+
+class SimulatedSwitch:
+    """取代 SwitchInputManager；set() 模擬撥動開關，會觸發 on_change 回呼。"""
+
+    def __init__(self):
+        self._on = ConfigManager().snapshot.simulation.switch_on
+        self._callback: Callable[[bool], None] | None = None
+
+    def is_switch_on(self) -> bool:
+        return self._on
+
+    def on_change(self, callback: Callable[[bool], None]):
+        self._callback = callback
+
+    def set(self, on: bool):
+        if on != self._on:
+            self._on = on
+            if self._callback is not None:
+                self._callback(on)
+
+    def close(self):
+        pass
+
+
+class SimulatedTempButtons:
+    """取代 TempButtonManager；press() 模擬按下溫度上調 / 下調按鈕。"""
+
+    def __init__(self, on_temp_change: Callable[[float], None]):
+        self._callback = on_temp_change
+
+    def press(self, degree_to_change: float):
+        self._callback(degree_to_change)
+
+    def close(self):
+        pass
+
+
+class SimulatedDisplay:
+    """取代 DisplayManager，只記住目前畫面。"""
+
+    def __init__(self):
+        self.text = ""
+
+    def show_temperature(self, temp_c: float):
+        self.text = f"{temp_c:.1f}" if 0.0 <= temp_c < 100.0 else "Err"
+
+    def show_text(self, text: str):
+        self.text = text[:4]
+
+    def clear(self):
+        self.text = ""
+
+
+class SimulatedLED:
+    """取代 PowerLED，只記住目前模式（"on" / "off" / "blink"）。"""
+
+    def __init__(self):
+        self.mode = "off"
+
+    def turn_on(self):
+        self.mode = "on"
+
+    def turn_off(self):
+        self.mode = "off"
+
+    def set_heating(self, heating: bool):
+        self.mode = "on" if heating else "blink"
+
+
+class SimulatedPlug:
+    """取代 RawKasaClient：切換模擬水浴的加熱器，並模擬網路延遲。"""
+
+    def __init__(self):
+        self._latency = ConfigManager().snapshot.simulation.plug_latency
+        self._water_bath = water_bath()
+        self._request_latencies = deque(maxlen=200)
+
+    async def _request(self, command: str):
+        started = time.perf_counter()
+        if self._latency > 0:
+            await asyncio.sleep(self._latency)
+        self._request_latencies.append((command, time.perf_counter() - started))
+
+    async def turn_on(self) -> bool:
+        await self._request("turn_on")
+        self._water_bath.set_heating(True)
+        return True
+
+    async def turn_off(self) -> bool:
+        await self._request("turn_off")
+        self._water_bath.set_heating(False)
+        return False
+
+    async def is_on(self) -> bool:
+        await self._request("is_on")
+        return self._water_bath.heating
+
+    async def close(self):
+        pass
+
+    def get_request_latencies(self) -> list[tuple[str, float]]:
+        return list(self._request_latencies)
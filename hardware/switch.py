@@ -1,6 +1,8 @@
 # hardware/switch_input_manager.py
 
 import logging
+from typing import Callable
+
 from gpiozero import Button
 from config.config_manager import ConfigManager
 
@@ -8,14 +10,22 @@ logger = logging.getLogger(__name__)
 
 class SwitchInputManager:
     def __init__(self):
-        cfg = ConfigManager()
-        pin = cfg.get_int("gpio.switch_input_pin", default=17)
+        pin = ConfigManager().snapshot.gpio.switch_input_pin
         self.switch = Button(pin, pull_up=True)
         logger.debug(f"Main switch initialized on GPIO{pin}")
 
     def is_switch_on(self) -> bool:
-        logger.debug(f"Switch is {'ON' if self.switch.is_pressed else 'OFF'}")
-        return self.switch.is_pressed
+        is_pressed = self.switch.is_pressed
+        logger.debug("Switch is %s", "ON" if is_pressed else "OFF")
+        return is_pressed
+
+    def on_change(self, callback: Callable[[bool], None]):
+        """
+        註冊開關狀態改變的回呼（按下為 True，放開為 False）。
+        注意：gpiozero 在自己的執行緒中呼叫回呼，需要時請用 loop.call_soon_threadsafe 轉交。
+        """
+        self.switch.when_pressed = lambda: callback(True)
+        self.switch.when_released = lambda: callback(False)
 
     def close(self):
         self.switch.close()
@@ -10,9 +10,9 @@ logger = logging.getLogger(__name__)
 
 class TempButtonManager:
     def __init__(self, on_temp_change: Callable[[float], None]):
-        cfg = ConfigManager()
-        up_pin = cfg.get_int("gpio.temp_up_switch_pin", default=9)
-        down_pin = cfg.get_int("gpio.temp_down_switch_pin", default=11)
+        gpio = ConfigManager().snapshot.gpio
+        up_pin = gpio.temp_up_switch_pin
+        down_pin = gpio.temp_down_switch_pin
 
         self.up_button = Button(up_pin, pull_up=True)
         self.down_button = Button(down_pin, pull_up=True)
@@ -0,0 +1,116 @@
+# hardware/temperature_sampler.py
+
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class TemperatureSampler:
+    """
+    在背景執行緒中持續讀取溫度計，與控制迴圈的 tick 解耦。
+    每筆讀值以 (timestamp, temperature) 形式寫入「最新值」槽位與環形緩衝區，
+    控制迴圈只需取用最新的樣本，不必等待 DS18B20 約 750ms 的轉換時間。
+    """
+
+    def __init__(self, thermometer, interval: float = 0.0, history_size: int = 600, error_backoff: float = 1.0,
+                 metrics=None, estimator=None):
+        """
+        Args:
+            thermometer: 任何提供 read_temperature() 的溫度計物件。
+            interval (float): 兩次讀取之間額外等待的秒數（0 表示連續讀取）。
+            history_size (int): 環形緩衝區保留的樣本數。
+            error_backoff (float): 讀取失敗後重試前等待的秒數。
+            metrics: 可選的 TickMetrics，記錄每次感測器讀取的耗時（stage "sensor_read"）。
+            estimator: 可選的 TemperatureEstimator；設定後樣本改為濾波後的溫度，離群讀值會被丟棄。
+        """
+        self._thermometer = thermometer
+        self._interval = interval
+        self._error_backoff = error_backoff
+        self._metrics = metrics
+        self._estimator = estimator
+        self._rate: float | None = None
+
+        self._lock = threading.Lock()
+        self._latest: tuple[float, float] | None = None
+        self._samples = deque(maxlen=history_size)
+        self._last_error: Exception | None = None
+
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        """啟動背景取樣執行緒；若已在執行則不做任何事。"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="TemperatureSampler", daemon=True)
+        self._thread.start()
+        logger.info("TemperatureSampler started.")
+
+    def stop(self, timeout: float | None = 2.0):
+        """停止背景取樣執行緒。"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        logger.info("TemperatureSampler stopped.")
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.perf_counter()
+            try:
+                temperature = self._thermometer.read_temperature()
+            except Exception as e:
+                self._last_error = e
+                logger.warning(f"TemperatureSampler: Failed to read temperature: {e}")
+                self._stop_event.wait(self._error_backoff)
+                continue
+
+            if self._metrics is not None:
+                self._metrics.observe("sensor_read", time.perf_counter() - started)
+            timestamp = time.time()
+            if self._estimator is not None:
+                if not self._estimator.update(timestamp, temperature):
+                    if self._metrics is not None:
+                        self._metrics.increment("temperature_rejected_total")
+                    continue
+                temperature = self._estimator.temperature
+            sample = (timestamp, temperature)
+            with self._lock:
+                self._latest = sample
+                if self._estimator is not None:
+                    self._rate = self._estimator.rate
+                self._samples.append(sample)
+            self._last_error = None
+
+            if self._interval > 0:
+                self._stop_event.wait(self._interval)
+
+    def get_latest(self) -> tuple[float, float] | None:
+        """
+        回傳最新的 (timestamp, temperature)，尚未有任何讀值時回傳 None。
+        此呼叫不會阻塞在感測器上。
+        """
+        with self._lock:
+            return self._latest
+
+    def get_rate(self) -> float | None:
+        """濾波器估計的升溫速率（°C/s）；未設定 estimator 或尚未有讀值時回傳 None。"""
+        with self._lock:
+            return self._rate
+
+    def get_samples(self) -> list[tuple[float, float]]:
+        """回傳環形緩衝區內所有樣本的副本（由舊到新）。"""
+        with self._lock:
+            return list(self._samples)
+
+    @property
+    def last_error(self) -> Exception | None:
+        """最近一次讀取失敗的例外；成功讀取後會被清除。"""
+        return self._last_error
@@ -2,7 +2,9 @@ import os
 import logging
 import random
 import time
-from collections import deque
+from typing import Callable
+
+from model.temperature_history import TemperatureHistory
 
 logger = logging.getLogger(__name__)
 
@@ -10,26 +12,49 @@ logger = logging.getLogger(__name__)
 class Thermometer:
     """
     使用 DS18B20 感測器從 /sys/bus/w1/devices/28-xxxx/w1_slave 讀取溫度。
-    注意：每次讀取會 blocking 最多約 750ms（12-bit 準確度時）。
+    注意：每次讀取會 blocking，時間取決於轉換解析度：
+    9-bit ≈ 94ms（0.5°C）、10-bit ≈ 188ms、11-bit ≈ 375ms、12-bit ≈ 750ms（0.0625°C）。
     """
     BASE_DIR = "/sys/bus/w1/devices"
+    RESOLUTIONS = (9, 10, 11, 12)
+    POWER_ON_RESET_VALUE = 85000  # 感測器上電後尚未完成轉換時回傳的值（m°C）
 
-    def __init__(self):
-        self.device_file = None  # lazy init
+    def __init__(self, device_file: str | None = None, resolution: int | None = None):
+        """
+        Args:
+            device_file: w1_slave 路徑，None 表示第一次讀取時自動尋找。
+            resolution: 轉換解析度（9~12 bit），None 表示沿用感測器目前的設定。
+        """
+        if resolution is not None and resolution not in self.RESOLUTIONS:
+            raise ValueError(f"Unsupported DS18B20 resolution {resolution}, expected one of {self.RESOLUTIONS}")
+        self.device_file = device_file  # None 表示 lazy init，第一次讀取時自動尋找
+        self.resolution = resolution
+        self._resolution_applied = False
         self._last_temperature = None  # 用於記錄上次讀取的溫度
         logger.debug("Thermometer initialized (lazy device setup)")
-        self._history = deque(maxlen=3600)
+        self._history = TemperatureHistory(capacity=3600)
 
-    def _find_device_file(self) -> str:
-        if not os.path.exists(self.BASE_DIR):
+    @classmethod
+    def find_device_files(cls) -> list[str]:
+        """回傳所有已掛載 DS18B20 的 w1_slave 路徑（依裝置 ID 排序）。"""
+        if not os.path.exists(cls.BASE_DIR):
             raise RuntimeError("1-Wire bus directory not found. Did you enable 1-Wire in raspi-config?")
 
-        devices = [d for d in os.listdir(self.BASE_DIR) if d.startswith("28-")]
+        devices = sorted(d for d in os.listdir(cls.BASE_DIR) if d.startswith("28-"))
         if not devices:
             raise RuntimeError("No DS18B20 device found under /sys/bus/w1/devices")
 
-        device_path = os.path.join(self.BASE_DIR, devices[0], "w1_slave")
-        return device_path
+        return [os.path.join(cls.BASE_DIR, d, "w1_slave") for d in devices]
+
+    def _find_device_file(self) -> str:
+        return self.find_device_files()[0]
+
+    @property
+    def probe_id(self) -> str | None:
+        """感測器 ID（例如 28-xxxxxxxxxxxx），尚未解析裝置時為 None。"""
+        if not self.device_file:
+            return None
+        return os.path.basename(os.path.dirname(self.device_file))
 
     def get_last_temperature(self) -> float | None:
         """
@@ -41,18 +66,48 @@ class Thermometer:
     def _record_temperature(self, temperature: float):
         self._last_temperature = temperature  # 更新最後讀取的溫度
         timestamp = time.time()
-        self._history.append((timestamp, temperature))
+        self._history.append(timestamp, temperature)
 
     def get_history(self):
         """
         回傳 list，每筆是 (timestamp, temperature)
         """
-        return list(self._history)
+        return [(ts, temp) for ts, temp, _ in self._history.to_list()]
+
+    def get_probe_temperatures(self) -> dict[str, float | None]:
+        """回傳 {probe_id: 最後讀值}；單一探針時只有一筆。"""
+        if self.probe_id is None:
+            return {}
+        return {self.probe_id: self._last_temperature}
+
+    def get_probe_histories(self) -> dict[str, list]:
+        """回傳 {probe_id: [(timestamp, temperature), ...]}。"""
+        if self.probe_id is None:
+            return {}
+        return {self.probe_id: self.get_history()}
+
+    def _apply_resolution(self):
+        """
+        透過 w1_therm 的 sysfs resolution 屬性設定轉換解析度（需要 Linux 5.9 以上與寫入權限），
+        核心會依解析度縮短等待轉換的時間。失敗時只記錄警告，沿用感測器原本的設定。
+        """
+        self._resolution_applied = True
+        if self.resolution is None:
+            return
+        path = os.path.join(os.path.dirname(self.device_file), "resolution")
+        try:
+            with open(path, "w") as f:
+                f.write(str(self.resolution))
+            logger.info(f"Thermometer {self.probe_id}: conversion resolution set to {self.resolution} bit")
+        except OSError as e:
+            logger.warning(f"Thermometer {self.probe_id}: failed to set resolution via {path}: {e}")
 
     def read_temperature(self) -> float:
         if not self.device_file:
             self.device_file = self._find_device_file()
             logger.debug(f"Thermometer device file resolved: {self.device_file}")
+        if not self._resolution_applied:
+            self._apply_resolution()
 
         try:
             with open(self.device_file, 'r') as f:
@@ -64,22 +119,41 @@ class Thermometer:
             raise RuntimeError("Sensor data not valid")
 
         try:
-            temp_str = lines[1].split("t=")[-1]
-            temperature = float(temp_str) / 1000.0
-            self._record_temperature(temperature)
-            return round(temperature, 2)
+            raw = int(lines[1].split("t=")[-1])
         except Exception as e:
             raise RuntimeError(f"Failed to parse temperature: {e}")
+        if raw == self.POWER_ON_RESET_VALUE:
+            # CRC 正確但其實是上電預設值，不是真的 85°C
+            raise RuntimeError("Sensor returned the 85°C power-on reset value")
 
+        temperature = raw / 1000.0
+        self._record_temperature(temperature)
+        return round(temperature, 2)
 
-class DummyThermometer:
+
+class DummyThermometer(Thermometer):
     """
     模擬溫度計，用於不接硬體時的測試。
-    每次返回 54 ± 0.5 度的隨機值。
+    預設每次返回 54 ± 0.5 度的隨機值；可傳入 source 改用其他溫度來源（例如模擬水浴）。
+    每次讀取會等待 conversion_time 秒，模擬 DS18B20 的轉換時間。
     """
 
-    def __init__(self):
+    def __init__(self, source: Callable[[], float] | None = None, conversion_time: float = 0.75):
+        super().__init__(device_file="dummy")
+        self._source = source
+        self._conversion_time = conversion_time
         logger.debug("DummyThermometer initialized")
 
+    @property
+    def probe_id(self) -> str | None:
+        return "dummy"
+
     def read_temperature(self) -> float:
-        return round(54.0 + random.uniform(-0.5, 0.5), 2)
\ No newline at end of file
+        if self._conversion_time > 0:
+            time.sleep(self._conversion_time)
+        if self._source is not None:
+            temperature = self._source()
+        else:
+            temperature = 54.0 + random.uniform(-0.5, 0.5)
+        self._record_temperature(temperature)
+        return round(temperature, 2)
\ No newline at end of file
@@ -1,9 +1,125 @@
 # logger_config.py
+import atexit
 import logging
+import logging.handlers
+import queue
+import threading
+from collections import deque
+
+from config.config_manager import ConfigManager
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_listener: logging.handlers.QueueListener | None = None
+_recent: "RecentRecordsHandler | None" = None
+
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler 預設會在呼叫端先把訊息格式化；同一個行程內不需要序列化，
+    直接把 record 丟進佇列，格式化全部交給 listener 執行緒。
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class RecentRecordsHandler(logging.Handler):
+    """把最近的紀錄保留在記憶體中（固定長度），供網頁查看。"""
+
+    def __init__(self, capacity: int = 500):
+        super().__init__()
+        self._records = deque(maxlen=capacity)
+        self._records_lock = threading.Lock()
+
+    def emit(self, record):
+        try:
+            entry = {
+                "t": record.created,
+                "level": record.levelname,
+                "name": record.name,
+                "message": record.getMessage(),
+            }
+            if record.exc_info:
+                entry["exc"] = logging.Formatter().formatException(record.exc_info)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._records_lock:
+            self._records.append(entry)
+
+    def get_records(self, limit: int | None = None, min_level: int = logging.NOTSET) -> list[dict]:
+        with self._records_lock:
+            records = [r for r in self._records if logging.getLevelName(r["level"]) >= min_level]
+        return records[-limit:] if limit else records
+
 
 def setup_logging():
-    logging.basicConfig(
-        level=logging.DEBUG,  # 或改成 logging.INFO
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
\ No newline at end of file
+    """
+    設定 logging：呼叫端只把 record 放進佇列，由 QueueListener 執行緒格式化並寫到 stderr
+    與記憶體中的最近紀錄。層級由 config.yaml 的 logging 區段決定，可在執行期間用 set_log_level() 調整。
+    """
+    global _listener, _recent
+    if _listener is not None:
+        return
+
+    config = ConfigManager().snapshot.logging
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT))
+    _recent = RecentRecordsHandler(capacity=config.recent_records)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(_InProcessQueueHandler(log_queue))
+    _apply_levels(config)
+    ConfigManager().subscribe(_on_config_changed)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, _recent, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # 結束前把佇列中剩下的紀錄寫完
+
+
+def _apply_levels(config):
+    logging.getLogger().setLevel(config.level.upper())
+    for name, level in config.levels.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+
+def _on_config_changed(old, new):
+    # 只有 logging 區段改變時才套用，避免覆蓋透過 /log_level 暫時調整的層級
+    if old.logging != new.logging:
+        try:
+            _apply_levels(new.logging)
+        except ValueError as e:
+            logging.getLogger(__name__).error(f"Invalid log level in config: {e}")
+
+
+def get_recent_records(limit: int | None = None, min_level: str = "NOTSET") -> list[dict]:
+    """回傳最近的紀錄（舊到新）；min_level 不合法時拋出 ValueError。"""
+    levels = logging.getLevelNamesMapping()
+    if min_level.upper() not in levels:
+        raise ValueError(f"Unknown level: {min_level}")
+    if _recent is None:
+        return []
+    return _recent.get_records(limit, levels[min_level.upper()])
+
+
+def set_log_level(name: str, level: str) -> str:
+    """
+    調整指定 logger（空字串或 "root" 表示根 logger）的層級，回傳新的層級名稱。
+    level 不合法時拋出 ValueError。
+    """
+    logger = logging.getLogger(None if name in ("", "root") else name)
+    logger.setLevel(level.upper())
+    return logging.getLevelName(logger.level)
+
+
+def get_log_levels() -> dict[str, str]:
+    """回傳根 logger 與所有明確設定過層級的 logger。"""
+    levels = {"root": logging.getLevelName(logging.getLogger().level)}
+    for name, logger in sorted(logging.root.manager.loggerDict.items()):
+        if isinstance(logger, logging.Logger) and logger.level != logging.NOTSET:
+            levels[name] = logging.getLevelName(logger.level)
+    return levels
@@ -1,58 +1,106 @@
 import asyncio
 import logging
-import yaml
-from hardware.switch import SwitchInputManager
+import signal
+from config.config_manager import ConfigManager
+from hardware.backends import create_backend
 from cooker.controller import SousVideController
 from logger_config import setup_logging
-from webui.app import WebUI
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
 
 
-def load_config():
-    try:
-        with open("config.yaml", "r") as f:
-            return yaml.safe_load(f)
-    except Exception as e:
-        logger.warning(f"Failed to load config.yaml: {e}")
-        raise
+async def start_web_server(controller, web_config):
+    """
+    依設定啟動網頁伺服器：
+    - asyncio：與控制迴圈共用 event loop，不另開執行緒
+    - flask  ：Flask 開發伺服器，跑在背景執行緒
+    """
+    host = web_config.host
+    port = web_config.port
+    if web_config.server == "asyncio":
+        from webui.async_server import AsyncWebServer
+        web = AsyncWebServer(
+            controller,
+            host=host,
+            port=port,
+            max_connections=web_config.max_connections,
+            request_timeout=web_config.request_timeout,
+        )
+        await web.start()
+    else:
+        from webui.app import WebUI
+        web = WebUI(controller, host=host, port=port)
+        web.run_in_background()
+    return web
 
 
 async def main():
-    config = load_config()
-    polling_interval = config.get("polling_interval")
+    config_manager = ConfigManager()
+    config = config_manager.snapshot
+
+    # 阻塞呼叫改由 LoopStallWatchdog 偵測；debug 模式只在開發時開啟
+    loop = asyncio.get_running_loop()
+    if config.asyncio_debug:
+        loop.set_debug(True)
+        loop.slow_callback_duration = 0.1  # 設定慢回調的閾值為 100ms
 
     controller = SousVideController(config=config)
-    web = WebUI(controller)
-    web.run_in_background()
-    switch_input = SwitchInputManager()
+    await start_web_server(controller, config.webui)
+
+    # gpiozero 在自己的執行緒中呼叫回呼，一律用 call_soon_threadsafe 轉交給 event loop
+    scheduler = controller.scheduler
+
+    def on_temp_change(degree_to_change: float):
+        controller.change_target_temperature(degree_to_change)
+        scheduler.wake()
+
+    switch_input = create_backend("switch", config.backends.switch)
+    switch_input.on_change(lambda on: loop.call_soon_threadsafe(scheduler.wake))
+    temp_buttons = create_backend(  # 需保留參考，按鈕物件被回收後回呼就不會觸發
+        "temp_buttons", config.backends.temp_buttons,
+        on_temp_change=lambda degree: loop.call_soon_threadsafe(on_temp_change, degree))
+
+    # 設定檔變更：目標溫度交給控制器，tick 間隔在下一輪直接從 snapshot 讀取
+    def apply_config(old, new):
+        if old.strategy.target_temperature != new.strategy.target_temperature:
+            controller.set_target_temperature(new.strategy.target_temperature)
+        scheduler.wake()
+
+    config_manager.subscribe(lambda old, new: loop.call_soon_threadsafe(apply_config, old, new))
+    config_manager.start_watching()
     last_switch_state = None
 
-    loop = asyncio.get_running_loop()
-    while True:
-        ts = loop.time()
-        switch_state = switch_input.is_switch_on()
+    # Ctrl+C 或 systemd stop 時取消主迴圈，讓 finally 寫完加熱紀錄
+    main_task = asyncio.current_task()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, main_task.cancel)
 
-        # If the switch is off, use a shorter polling interval, since nothing to wait for.
-        actual_polling_interval = polling_interval if switch_state else 0.2
+    try:
+        while True:
+            switch_state = switch_input.is_switch_on()
+            config = config_manager.snapshot
 
-        if switch_state != last_switch_state:
-            await controller.on_switch_changed(switch_state)
-            last_switch_state = switch_state
+            if switch_state != last_switch_state:
+                await controller.on_switch_changed(switch_state)
+                last_switch_state = switch_state
 
-        await controller.tick()
-        remaining_time = actual_polling_interval - (loop.time() - ts)
-        if remaining_time < 0.1:
-            logger.warning(f"Tick took too long, see logs for details. Remaining time: {remaining_time:.2f}s")
-            remaining_time = 0.1
-        await asyncio.sleep(remaining_time)
+            await controller.tick()
+            # 開關關閉時只等 GPIO 事件（或偶爾刷新狀態）；啟動時依水溫決定間隔
+            scheduler.schedule(controller.next_tick_interval(config))
+            # deadline 到了、策略要求重新評估，或開關 / 按鈕有事件時醒來
+            await scheduler.wait()
+    finally:
+        logger.info("Shutting down, flushing heating log.")
+        config_manager.stop_watching()
+        controller.close()
 
 
 if __name__ == "__main__":
     main_loop = asyncio.get_event_loop()
-    main_loop.set_debug(True)
-    main_loop.slow_callback_duration = 0.1  # 設定慢回調的閾值為 100ms
-    main_loop.run_until_complete(main())
+    try:
+        main_loop.run_until_complete(main())
+    except asyncio.CancelledError:
+        pass
     main_loop.close()
@@ -0,0 +1,98 @@
+# model/status_stream.py
+
+import json
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    單一客戶端的訂閱。內部是有上限的佇列，塞滿時直接丟掉最舊的事件，
+    慢的客戶端只會漏掉過時的畫面，不會讓發佈端阻塞或記憶體無限成長。
+    """
+
+    def __init__(self, maxsize: int, on_event=None):
+        self._events = deque(maxlen=maxsize)
+        self._condition = threading.Condition()
+        self._closed = False
+        self._on_event = on_event  # 有新事件時呼叫（例如喚醒 asyncio 端的等待者）
+        self.dropped = 0
+
+    def put(self, event: str):
+        with self._condition:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._condition.notify()
+        if self._on_event is not None:
+            self._on_event()
+
+    def get(self, timeout: float | None = None) -> str | None:
+        """取出下一個事件；逾時或訂閱已關閉時回傳 None。"""
+        with self._condition:
+            if not self._events and not self._closed:
+                self._condition.wait(timeout)
+            if self._events:
+                return self._events.popleft()
+            return None
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._on_event is not None:
+            self._on_event()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class StatusStream:
+    """
+    把每個 tick 的狀態事件推送給所有訂閱者。
+    事件只序列化一次，所有訂閱者共用同一份字串。
+    """
+
+    def __init__(self, max_subscribers: int = 16, queue_size: int = 8):
+        self.max_subscribers = max_subscribers
+        self._queue_size = queue_size
+        self._subscribers: list[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, on_event=None) -> Subscription | None:
+        """
+        新增訂閱；超過訂閱上限時回傳 None。
+        on_event 為選用的無參數 callback，每次有新事件或訂閱關閉時呼叫。
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                logger.warning(f"StatusStream: Subscriber limit ({self.max_subscribers}) reached.")
+                return None
+            subscription = Subscription(self._queue_size, on_event)
+            self._subscribers.append(subscription)
+        logger.info(f"StatusStream: Client subscribed ({len(self._subscribers)} active).")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+        logger.info(f"StatusStream: Client unsubscribed ({len(self._subscribers)} active).")
+
+    def publish(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        payload = json.dumps(event, separators=(",", ":"))
+        for subscription in subscribers:
+            subscription.put(payload)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
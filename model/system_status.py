@@ -1,16 +1,96 @@
+import time
+
+from model.status_stream import StatusStream
+
+
 class SystemStatus:
     def __init__(self, thermometer, kasa_client, strategy, controller):
         self.thermometer = thermometer
         self.kasa_client = kasa_client
         self.strategy = strategy
         self.controller = controller
+        self.stream = StatusStream()
 
     def snapshot(self):
+        rate = self.controller.temperature_sampler.get_rate()
         return {
             "temperature": self.thermometer.get_last_temperature(),
             "target": self.strategy.target_temperature,
             "heating": self.kasa_client.is_on(),
+            "probes": self.thermometer.get_probe_temperatures(),
+            "rate": round(rate * 60, 3) if rate is not None else None,  # °C/min
+        }
+
+    def publish_tick(self, tick_latency: float):
+        """
+        每個 tick 結束時呼叫，推送一筆精簡的狀態事件給所有串流訂閱者。
+        t 是推送時間；sample_time / sample_temperature 是歷史紀錄中最新的一點，
+        網頁以它延伸圖表並作為 /temperature_history?since= 的起點，才不會漏點或重複。
+        """
+        latest = self.controller.history.latest()
+        self.stream.publish({
+            "t": round(time.time(), 3),
+            "sample_time": latest[0] if latest else None,
+            "sample_temperature": latest[1] if latest else None,
+            "temperature": self.thermometer.get_last_temperature(),
+            "target": self.strategy.target_temperature,
+            "heating": self.kasa_client.is_on(),
+            "active": self.controller.active,
+            "latency": round(tick_latency, 4),
+        })
+
+    def get_temperature_history(self, start: float | None = None, end: float | None = None):
+        """回傳 [(timestamp, temperature, heating), ...]，可用 start/end 限定時間範圍。"""
+        return self.controller.history.to_list(start, end)
+
+    def query_temperature_history(self, since: float | None = None, max_points: int | None = None):
+        """
+        增量、可縮減的歷史查詢，回傳可直接轉成 JSON 的 dict：
+        {"points": [[timestamp, temperature, heating], ...], "resolution": 秒, "latest": 最後一點的 timestamp}
+        """
+        points, resolution = self.controller.history.query(since=since, max_points=max_points)
+        latest = self.controller.history.latest()
+        return {
+            "points": points,
+            "resolution": resolution,
+            "latest": latest[0] if latest else since,
+        }
+
+    def get_probe_histories(self):
+        return self.thermometer.get_probe_histories()
+
+    def render_metrics(self) -> str:
+        """以 Prometheus text format 回傳 tick 各階段延遲與目前狀態。"""
+        controller = self.controller
+        latest = controller.temperature_sampler.get_latest()
+        gauges = {
+            "active": int(controller.active),
+            "target_temperature_celsius": self.strategy.target_temperature,
+            "stream_subscribers": self.stream.subscriber_count,
         }
+        # 累計次數以 counter 輸出（名稱以 _total 結尾），與 ticks_total 等一致
+        counters = {"data_logger_dropped_total": controller.data_logger.dropped}
+        if latest is not None:
+            gauges["temperature_celsius"] = latest[1]
+            gauges["sample_age_seconds"] = round(time.time() - latest[0], 3)
+        rate = controller.temperature_sampler.get_rate()
+        if rate is not None:
+            gauges["temperature_rate_celsius_per_second"] = round(rate, 5)
+        heating = self.kasa_client.is_on()
+        if heating is not None:
+            gauges["heating"] = int(heating)
+        scheduler = controller.scheduler
+        if scheduler.interval is not None:
+            gauges["tick_interval_seconds"] = scheduler.interval
+        gauges["tick_max_lateness_seconds"] = round(scheduler.max_lateness, 4)
+        if controller.stall_watchdog is not None:
+            counters["loop_stalls_total"] = controller.stall_watchdog.stall_count
+            gauges["loop_longest_stall_seconds"] = round(controller.stall_watchdog.longest_stall, 4)
+        return controller.metrics.render_prometheus(gauges, counters)
 
-    def get_temperature_history(self):
-        return self.thermometer.get_temperature_history()
\ No newline at end of file
+    def get_stall_profile(self) -> str | None:
+        """event loop 卡住時取樣到的堆疊（flame graph folded 格式）；未啟用偵測時回傳 None。"""
+        watchdog = self.controller.stall_watchdog
+        if watchdog is None:
+            return None
+        return watchdog.folded()
@@ -0,0 +1,125 @@
+# model/temperature_estimator.py
+
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+def quantization_std(resolution_bits: int) -> float:
+    """DS18B20 在指定解析度下的量化誤差標準差（°C）：間距 0.5 / 2^(bits-9)，均勻分布。"""
+    step = 0.5 / (1 << (resolution_bits - 9))
+    return step / math.sqrt(12)
+
+
+class TemperatureEstimator:
+    """
+    追蹤溫度與升溫速率的 Kalman filter（等速模型：狀態為 [溫度, °C/s]），
+    並以創新值門檻剔除離群讀值（例如 CRC 通過的突波）。
+
+    - 每次 update() 依實際時間差預測，所以取樣間隔不固定也沒關係
+    - 讀值與預測相差超過 gate 個標準差時丟棄
+    - 被丟棄的讀值與上一個估計值連成一直線時（升溫速率突然改變，而不是突波），不等滿
+      max_rejections 就重新初始化；連續丟棄超過 max_rejections 次則視為真的跳變（例如探針剛放進水裡）
+    - 重新初始化時速率取這段讀值的斜率，避免持續升溫時從 0 開始追而再次落入丟棄 / 重設的循環
+    - 2x2 矩陣手算，不依賴 numpy
+    """
+
+    MIN_RAMP_READINGS = 3  # 至少幾筆連續丟棄的讀值才判斷是否為速率改變
+
+    def __init__(self, process_noise: float = 1e-5, measurement_noise: float = 0.05, gate: float = 4.0,
+                 max_rejections: int = 5):
+        """
+        Args:
+            process_noise (float): 溫度加速度的頻譜密度（°C²/s³），越大越快跟上速率變化。
+            measurement_noise (float): 讀值雜訊標準差（°C），應包含量化誤差。
+            gate (float): 離群門檻（標準差倍數）。
+            max_rejections (int): 連續丟棄幾次後重新初始化。
+        """
+        self.process_noise = process_noise
+        self.measurement_variance = measurement_noise ** 2
+        self.gate = gate
+        self.max_rejections = max_rejections
+
+        self.timestamp: float | None = None
+        self.temperature = 0.0
+        self.rate = 0.0  # °C/s
+        self._p00 = self._p01 = self._p11 = 0.0
+        self.rejected = 0  # 累計丟棄次數
+        self._rejected_readings: list[tuple[float, float]] = []  # 目前這段連續丟棄的 (timestamp, 讀值)
+
+    @property
+    def initialized(self) -> bool:
+        return self.timestamp is not None
+
+    def reset(self, timestamp: float, measurement: float, rate: float = 0.0, rate_variance: float = 0.0):
+        self.timestamp = timestamp
+        self.temperature = measurement
+        self.rate = rate
+        self._p00 = self.measurement_variance
+        self._p01 = 0.0
+        self._p11 = max(0.01 ** 2, rate_variance)  # 初始速率不確定度至少約 0.01°C/s
+        self._rejected_readings.clear()
+
+    def _fit_line(self, readings: list[tuple[float, float]]) -> tuple[float, float, float]:
+        """
+        最小平方法擬合 [(timestamp, 讀值), ...]，回傳 (斜率 °C/s, 斜率的變異數, 最大殘差 °C)。
+        讀值間隔很短時斜率很不準，變異數會很大，重新初始化後濾波器會很快修正速率。
+        """
+        n = len(readings)
+        mean_t = sum(t for t, _ in readings) / n
+        mean_z = sum(z for _, z in readings) / n
+        denominator = sum((t - mean_t) ** 2 for t, _ in readings)
+        if denominator <= 0:
+            return 0.0, 0.0, max(abs(z - mean_z) for _, z in readings)
+        slope = sum((t - mean_t) * (z - mean_z) for t, z in readings) / denominator
+        residual = max(abs(z - mean_z - slope * (t - mean_t)) for t, z in readings)
+        return slope, self.measurement_variance / denominator, residual
+
+    def update(self, timestamp: float, measurement: float) -> bool:
+        """加入一筆讀值，回傳是否被採用（False 表示被當作離群值丟棄）。"""
+        if self.timestamp is None:
+            self.reset(timestamp, measurement)
+            return True
+
+        # 預測
+        dt = max(0.0, timestamp - self.timestamp)
+        q = self.process_noise
+        temperature = self.temperature + self.rate * dt
+        p00 = self._p00 + dt * 2 * self._p01 + dt * dt * self._p11 + q * dt ** 3 / 3
+        p01 = self._p01 + dt * self._p11 + q * dt * dt / 2
+        p11 = self._p11 + q * dt
+
+        # 離群值檢查
+        innovation = measurement - temperature
+        innovation_variance = p00 + self.measurement_variance
+        if innovation * innovation > self.gate * self.gate * innovation_variance:
+            self.rejected += 1
+            self._rejected_readings.append((timestamp, measurement))
+            rejected = self._rejected_readings
+            if len(rejected) >= self.MIN_RAMP_READINGS:
+                # 連同上一個估計值擬合直線；殘差都在量測雜訊內表示是連續的升溫 / 降溫
+                points = [(self.timestamp, self.temperature), *rejected]
+                rate, rate_variance, residual = self._fit_line(points)
+                ramp = residual <= self.gate * math.sqrt(self.measurement_variance)
+                if ramp or len(rejected) > self.max_rejections:
+                    if not ramp:
+                        rate, rate_variance, _ = self._fit_line(rejected)
+                    logger.warning("TemperatureEstimator: %d consecutive outliers (%s), re-initializing at %.2f°C, "
+                                   "%.4f°C/s", len(rejected), "rate change" if ramp else "jump", measurement, rate)
+                    self.reset(timestamp, measurement, rate, rate_variance)
+                    return True
+            logger.info("TemperatureEstimator: Rejected reading %.2f°C (predicted %.2f°C)", measurement, temperature)
+            return False
+
+        # 更新
+        k0 = p00 / innovation_variance
+        k1 = p01 / innovation_variance
+        self.timestamp = timestamp
+        self.temperature = temperature + k0 * innovation
+        self.rate = self.rate + k1 * innovation
+        self._p00 = (1 - k0) * p00
+        self._p01 = (1 - k0) * p01
+        self._p11 = p11 - k1 * p01
+        self._rejected_readings.clear()
+        return True
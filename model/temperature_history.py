@@ -0,0 +1,245 @@
+# model/temperature_history.py
+
+import math
+import threading
+from array import array
+
+_HEATING_UNKNOWN = -1
+
+
+class TemperatureHistory:
+    """
+    以 array 為底的欄位式環形緩衝區，保存 timestamp、temperature 與插座狀態。
+
+    - append 為 O(1)，容量在建立時一次配置完成，之後不再重新配置記憶體。
+    - 每筆只佔 17 bytes（double + double + int8），1 Hz 保存 24 小時約 1.4 MB。
+    - views() 回傳 memoryview（最多兩段，因為環形緩衝區可能繞回開頭），不複製資料。
+      注意：view 是「活的」，緩衝區寫滿後最舊的位置會被覆寫，需要穩定資料時請自行複製。
+    """
+
+    def __init__(self, capacity: int = 86400):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._temperatures = array("d", bytes(8 * capacity))
+        self._heating = array("b", bytes(capacity))
+        self._start = 0  # 最舊一筆的實體位置
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp: float, temperature: float, heating: bool | None = None):
+        with self._lock:
+            if self._size < self.capacity:
+                pos = (self._start + self._size) % self.capacity
+                self._size += 1
+            else:
+                pos = self._start
+                self._start = (self._start + 1) % self.capacity
+            self._timestamps[pos] = timestamp
+            self._temperatures[pos] = temperature
+            self._heating[pos] = _HEATING_UNKNOWN if heating is None else int(heating)
+
+    def clear(self):
+        with self._lock:
+            self._start = 0
+            self._size = 0
+
+    def _timestamp_at(self, index: int) -> float:
+        return self._timestamps[(self._start + index) % self.capacity]
+
+    def _bisect_left(self, timestamp: float) -> int:
+        """回傳第一筆 timestamp >= 指定時間的邏輯索引（timestamp 需遞增）。"""
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._timestamp_at(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _index_range(self, start: float | None, end: float | None) -> tuple[int, int]:
+        lo = 0 if start is None else self._bisect_left(start)
+        hi = self._size if end is None else self._bisect_left(end)
+        return lo, max(lo, hi)
+
+    def _segments(self, lo: int, hi: int) -> list[tuple[int, int]]:
+        """把邏輯索引區間 [lo, hi) 轉成最多兩段實體索引區間。"""
+        if lo >= hi:
+            return []
+        first = (self._start + lo) % self.capacity
+        count = hi - lo
+        if first + count <= self.capacity:
+            return [(first, first + count)]
+        return [(first, self.capacity), (0, first + count - self.capacity)]
+
+    def count(self, start: float | None = None, end: float | None = None) -> int:
+        """回傳時間區間 [start, end) 內的筆數（不複製資料）。"""
+        with self._lock:
+            lo, hi = self._index_range(start, end)
+            return hi - lo
+
+    def views(self, start: float | None = None, end: float | None = None) -> list[tuple[memoryview, memoryview, memoryview]]:
+        """
+        回傳時間區間 [start, end) 內資料的 zero-copy view。
+        每段為 (timestamps, temperatures, heating) 三個 memoryview，heating 中 -1 表示未知。
+        """
+        with self._lock:
+            lo, hi = self._index_range(start, end)
+            segments = self._segments(lo, hi)
+        ts, temps, heating = memoryview(self._timestamps), memoryview(self._temperatures), memoryview(self._heating)
+        return [(ts[a:b], temps[a:b], heating[a:b]) for a, b in segments]
+
+    def to_list(self, start: float | None = None, end: float | None = None) -> list[tuple[float, float, bool | None]]:
+        """複製時間區間 [start, end) 內的資料成 [(timestamp, temperature, heating), ...]。"""
+        with self._lock:
+            lo, hi = self._index_range(start, end)
+            result = []
+            for a, b in self._segments(lo, hi):
+                for i in range(a, b):
+                    h = self._heating[i]
+                    result.append((self._timestamps[i], self._temperatures[i], None if h == _HEATING_UNKNOWN else bool(h)))
+            return result
+
+    def latest(self) -> tuple[float, float, bool | None] | None:
+        with self._lock:
+            if self._size == 0:
+                return None
+            pos = (self._start + self._size - 1) % self.capacity
+            h = self._heating[pos]
+            return self._timestamps[pos], self._temperatures[pos], None if h == _HEATING_UNKNOWN else bool(h)
+
+
+def minmax_reduce(points: list[tuple], max_points: int) -> list[tuple]:
+    """
+    把點列依時間平均切成 max_points // 2 個桶，每桶保留最低與最高兩點（依時間排序）。
+    保留溫度尖峰，適合畫圖。點列本身需依時間遞增。
+    """
+    if len(points) <= max_points or max_points < 2:
+        return points
+    bucket_count = max_points // 2
+    size = len(points) / bucket_count
+    result = []
+    for b in range(bucket_count):
+        bucket = points[int(b * size):int((b + 1) * size)]
+        if not bucket:
+            continue
+        low = min(bucket, key=lambda p: p[1])
+        high = max(bucket, key=lambda p: p[1])
+        if low is high:
+            result.append(low)
+        elif low[0] <= high[0]:
+            result.extend((low, high))
+        else:
+            result.extend((high, low))
+    return result
+
+
+class _AggregateLevel:
+    """
+    單一解析度的預先彙整：每個 width 秒的桶只保留最低與最高兩點。
+    已關閉的桶存進 TemperatureHistory，仍在累積的桶另外保存在記憶體中。
+    """
+
+    def __init__(self, width: float, capacity: int):
+        self.width = width
+        self.closed = TemperatureHistory(capacity=capacity)
+        self._bucket: int | None = None
+        self._low: tuple | None = None
+        self._high: tuple | None = None
+
+    def add(self, point: tuple):
+        bucket = math.floor(point[0] / self.width)
+        if bucket != self._bucket:
+            self._close()
+            self._bucket, self._low, self._high = bucket, point, point
+            return
+        if point[1] < self._low[1]:
+            self._low = point
+        if point[1] > self._high[1]:
+            self._high = point
+
+    def _close(self):
+        for point in self._open_points():
+            self.closed.append(*point)
+
+    def _open_points(self) -> list[tuple]:
+        if self._low is None:
+            return []
+        if self._low is self._high:
+            return [self._low]
+        return sorted((self._low, self._high), key=lambda p: p[0])
+
+    def count(self, start: float | None, end: float | None) -> int:
+        return self.closed.count(start, end) + 2
+
+    def to_list(self, start: float | None, end: float | None) -> list[tuple]:
+        points = self.closed.to_list(start, end)
+        points.extend(p for p in self._open_points()
+                      if (start is None or p[0] >= start) and (end is None or p[0] < end))
+        return points
+
+    def clear(self):
+        self.closed.clear()
+        self._bucket, self._low, self._high = None, None, None
+
+
+class MultiResolutionHistory(TemperatureHistory):
+    """
+    在 TemperatureHistory 之外，額外在寫入時增量維護數個解析度的最低/最高彙整，
+    讓 query(max_points=...) 只需處理與 max_points 同數量級的點，不必掃過整段原始資料。
+    """
+
+    LEVEL_WIDTHS = (10.0, 30.0, 120.0, 600.0)  # 秒
+
+    def __init__(self, capacity: int = 86400, level_widths: tuple[float, ...] = LEVEL_WIDTHS):
+        super().__init__(capacity)
+        # 以 1 Hz 取樣估算每個解析度需要的容量，每桶最多兩點
+        self._levels = [_AggregateLevel(w, 2 * math.ceil(capacity / w) + 2) for w in level_widths]
+
+    def append(self, timestamp: float, temperature: float, heating: bool | None = None):
+        super().append(timestamp, temperature, heating)
+        with self._lock:
+            point = (timestamp, temperature, heating)
+            for level in self._levels:
+                level.add(point)
+
+    def clear(self):
+        super().clear()
+        with self._lock:
+            for level in self._levels:
+                level.clear()
+
+    def query(self, since: float | None = None, max_points: int | None = None) -> tuple[list[tuple], float]:
+        """
+        回傳 (points, resolution)。
+        - since：只回傳 timestamp 大於此值的點（增量查詢）。
+        - max_points：點數上限；超過時改用最適合的預先彙整，再做一次最低/最高縮減。
+        resolution 為所用彙整的桶寬（秒），0 表示原始資料。
+        """
+        if max_points is None or self.count(since) <= max_points:
+            return self._after(self.to_list(since), since), 0.0
+
+        # 由細到粗找第一個點數不超過 4 倍上限的解析度，縮減成本便與 max_points 同數量級
+        with self._lock:
+            chosen = self._levels[-1]
+            for level in self._levels:
+                if level.count(since, None) <= 4 * max_points:
+                    chosen = level
+                    break
+            points = chosen.to_list(since, None)
+        return minmax_reduce(self._after(points, since), max_points), chosen.width
+
+    @staticmethod
+    def _after(points: list[tuple], since: float | None) -> list[tuple]:
+        if since is None:
+            return points
+        # 只有開頭幾筆可能剛好等於 since，跳過即可
+        i = 0
+        while i < len(points) and points[i][0] <= since:
+            i += 1
+        return points[i:]
@@ -0,0 +1,94 @@
+# model/tick_metrics.py
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# 秒；涵蓋 GPIO 寫入（< 1ms）到網路請求與感測器轉換（~1s）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class LatencyHistogram:
+    """固定桶的延遲直方圖，observe() 只做一次二分搜尋與兩次加法；本身不加鎖，由 TickMetrics 保護。"""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最後一格是 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class TickMetrics:
+    """
+    控制迴圈每個階段的延遲直方圖與計數器，可輸出成 Prometheus text format。
+    取樣、輸出與 event loop 執行緒都會更新，所有更新與輸出時的複製都在同一把鎖內，
+    輸出的 +Inf、_count 與各桶的累計值才會一致。
+
+    用法：
+        with metrics.stage("display"):
+            display.show_temperature(t)
+    """
+
+    def __init__(self, prefix: str = "sousvide"):
+        self.prefix = prefix
+        self.stages: dict[str, LatencyHistogram] = {}
+        self.counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def increment(self, counter: str, amount: int = 1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def render_prometheus(self, gauges: dict[str, float] | None = None,
+                          counters: dict[str, int] | None = None) -> str:
+        """
+        gauges / counters 為呼叫端額外提供的數值（例如其他元件自己維護的累計次數）。
+        可從其他執行緒（Flask）呼叫：在鎖內複製各直方圖，輸出的是同一時間點的一致快照。
+        """
+        with self._lock:
+            stages = {stage: (histogram.buckets, list(histogram.counts), histogram.sum, histogram.count)
+                      for stage, histogram in self.stages.items()}
+            counters = {**self.counters, **(counters or {})}
+        name = f"{self.prefix}_tick_stage_seconds"
+        lines = [
+            f"# HELP {name} Latency of each controller tick stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, (buckets, bucket_counts, total, count) in sorted(stages.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        for counter, value in sorted(counters.items()):
+            lines.append(f"# TYPE {self.prefix}_{counter} counter")
+            lines.append(f"{self.prefix}_{counter} {value}")
+
+        for gauge, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE {self.prefix}_{gauge} gauge")
+            lines.append(f"{self.prefix}_{gauge} {value}")
+        return "\n".join(lines) + "\n"
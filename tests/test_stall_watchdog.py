@@ -0,0 +1,31 @@
+import asyncio
+import unittest
+
+from cooker.stall_watchdog import LoopStallWatchdog
+
+
+class LoopStallWatchdogTest(unittest.TestCase):
+    def test_restart_reschedules_heartbeat(self):
+        async def scenario():
+            watchdog = LoopStallWatchdog(stall_threshold=0.2)
+            watchdog.start()
+            watchdog.stop()
+            self.assertIsNone(watchdog._beat_handle)
+
+            watchdog.start()
+            try:
+                first = watchdog._beat_handle
+                self.assertIsNotNone(first)
+                await asyncio.sleep(watchdog._heartbeat_interval * 3)
+                # 心跳有持續重新排程，且沒有誤報卡住
+                self.assertIsNot(watchdog._beat_handle, first)
+                self.assertFalse(watchdog._beat_handle.cancelled())
+                self.assertEqual(watchdog.stall_count, 0)
+            finally:
+                watchdog.stop()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
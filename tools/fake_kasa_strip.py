@@ -0,0 +1,266 @@
+# tools/fake_kasa_strip.py
+"""
+本機假的 Kasa 延長線（IOT / XOR 協定），用來在沒有實體設備的情況下測試
+KasaClient / RawKasaClient 的延遲與容錯。
+
+支援：
+- UDP 探索（回應 system.get_sysinfo）
+- TCP 查詢：system.get_sysinfo、system.set_relay_state（可帶 context.child_ids 指定插孔），
+  同一個請求中可包含多個指令；其他模組一律回覆「不支援」
+- 故障注入：固定 / 隨機延遲、丟包（不回應直接斷線）、逾時（不回應也不斷線）、relay 自行翻轉
+
+用法：
+    python -m tools.fake_kasa_strip --port 9999 --latency 0.05 --loss 0.05 --flap-rate 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import struct
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct(">I")
+_DEVICE_ID = "8006FAKESTRIP0000000000000000000000000000"
+
+
+def xor_encrypt(data: bytes) -> bytes:
+    key = 171
+    out = bytearray()
+    for b in data:
+        key ^= b
+        out.append(key)
+    return bytes(out)
+
+
+def xor_decrypt(data: bytes) -> bytes:
+    key = 171
+    out = bytearray()
+    for b in data:
+        out.append(key ^ b)
+        key = b
+    return bytes(out)
+
+
+class FaultConfig:
+    """故障注入參數；機率皆為每次請求（flap_rate 為每秒）的機率。"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, loss: float = 0.0,
+                 timeout: float = 0.0, flap_rate: float = 0.0):
+        self.latency = latency  # 每次回應前的固定延遲（秒）
+        self.jitter = jitter  # 額外的 0~jitter 秒隨機延遲
+        self.loss = loss  # 收到請求後直接斷線、不回應的機率
+        self.timeout = timeout  # 收到請求後卡住不回應（也不斷線）的機率
+        self.flap_rate = flap_rate  # 每秒每個插孔自行翻轉 relay 的機率
+
+
+class FakeKasaStrip:
+    """
+    假的 HS300 類型延長線。relay_log 記錄每次 set_relay_state：(loop 時間, 插孔序號, 新狀態, 原狀態)。
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9999, children: int = 3,
+                 faults: FaultConfig | None = None, seed: int | None = None):
+        self.host = host
+        self.port = port
+        self.faults = faults or FaultConfig()
+        self.states = [False] * children
+        self.relay_log: list[tuple[float, int, bool, bool]] = []
+        self.flap_log: list[tuple[float, int, bool]] = []
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._tcp_server: asyncio.AbstractServer | None = None
+        self._udp_transport: asyncio.DatagramTransport | None = None
+        self._flap_task: asyncio.Task | None = None
+        self._connections: set[asyncio.StreamWriter] = set()
+
+    # --- lifecycle --------------------------------------------------------
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._tcp_server = await asyncio.start_server(self._handle_tcp, self.host, self.port)
+        if self.port == 0:
+            self.port = self._tcp_server.sockets[0].getsockname()[1]
+        self._udp_transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DiscoveryProtocol(self), local_addr=(self.host, self.port))
+        if self.faults.flap_rate > 0:
+            self._flap_task = asyncio.create_task(self._flap())
+        logger.info(f"FakeKasaStrip listening on {self.host}:{self.port} (tcp+udp)")
+
+    async def stop(self):
+        if self._flap_task is not None:
+            self._flap_task.cancel()
+        for writer in list(self._connections):
+            writer.close()
+        self._connections.clear()
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+            await self._tcp_server.wait_closed()
+
+    # --- protocol ---------------------------------------------------------
+
+    def sys_info(self) -> dict:
+        return {
+            "sw_ver": "1.0.12 Build 000000 Rel.000000",
+            "hw_ver": "1.0",
+            "model": "HS300(US)",
+            "deviceId": _DEVICE_ID,
+            "oemId": "FAKEOEM",
+            "hwId": "FAKEHW",
+            "rssi": -40,
+            "latitude_i": 0,
+            "longitude_i": 0,
+            "alias": "Fake Strip",
+            "status": "new",
+            "mic_type": "IOT.SMARTPLUGSWITCH",
+            "feature": "TIM",
+            "mac": "00:00:00:00:00:01",
+            "updating": 0,
+            "led_off": 0,
+            "children": [
+                {"id": f"{i:02d}", "state": int(on), "alias": f"Socket {i + 1}", "on_time": 0, "next_action": {"type": -1}}
+                for i, on in enumerate(self.states)
+            ],
+            "child_num": len(self.states),
+            "err_code": 0,
+        }
+
+    def _child_indexes(self, request: dict) -> list[int]:
+        child_ids = request.get("context", {}).get("child_ids")
+        if not child_ids:
+            return list(range(len(self.states)))
+        indexes = []
+        for child_id in child_ids:
+            for i in range(len(self.states)):
+                if child_id.endswith(f"{i:02d}"):
+                    indexes.append(i)
+        return indexes
+
+    def handle_request(self, request: dict) -> dict:
+        self.request_count += 1
+        now = asyncio.get_running_loop().time()
+        response = {}
+        for module, commands in request.items():
+            if module == "context":
+                continue
+            if module != "system" or not isinstance(commands, dict):
+                response[module] = {"err_code": -1, "err_msg": "module not support"}
+                continue
+            result = {}
+            for name, args in commands.items():
+                if name == "get_sysinfo":
+                    result[name] = self.sys_info()
+                elif name == "set_relay_state":
+                    new_state = bool(args.get("state"))
+                    for i in self._child_indexes(request):
+                        self.relay_log.append((now, i, new_state, self.states[i]))
+                        self.states[i] = new_state
+                    result[name] = {"err_code": 0}
+                else:
+                    result[name] = {"err_code": -2, "err_msg": "member not support"}
+            response[module] = result
+        return response
+
+    async def _inject_faults(self) -> str | None:
+        """依設定延遲；回傳 'loss' 或 'timeout' 表示這次不回應。"""
+        delay = self.faults.latency + self._random.uniform(0, self.faults.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        roll = self._random.random()
+        if roll < self.faults.loss:
+            return "loss"
+        if roll < self.faults.loss + self.faults.timeout:
+            return "timeout"
+        return None
+
+    async def _handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(_LENGTH.size)
+                payload = await reader.readexactly(_LENGTH.unpack(header)[0])
+                request = json.loads(xor_decrypt(payload))
+                fault = await self._inject_faults()
+                if fault == "loss":
+                    self._connections.discard(writer)
+                    writer.close()
+                    return
+                if fault == "timeout":
+                    return  # 保持連線但不再回應，直到 stop() 關閉
+                body = xor_encrypt(json.dumps(self.handle_request(request)).encode())
+                writer.write(_LENGTH.pack(len(body)) + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # 連線中止或伺服器關閉時安靜結束
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _flap(self):
+        """模擬 relay 自行翻轉（例如手動按下實體按鈕或韌體異常）。"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(1.0)
+            for i in range(len(self.states)):
+                if self._random.random() < self.faults.flap_rate:
+                    self.states[i] = not self.states[i]
+                    self.flap_log.append((loop.time(), i, self.states[i]))
+                    logger.info(f"FakeKasaStrip: Socket {i} flapped to {self.states[i]}")
+
+
+class _DiscoveryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, strip: FakeKasaStrip):
+        self._strip = strip
+
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            request = json.loads(xor_decrypt(data))
+        except ValueError:
+            return
+        if "system" not in request:
+            return
+        if self._strip._random.random() < self._strip.faults.loss:
+            return
+        response = {"system": {"get_sysinfo": self._strip.sys_info()}}
+        self._transport.sendto(xor_encrypt(json.dumps(response).encode()), addr)
+
+
+async def _serve(args):
+    faults = FaultConfig(latency=args.latency, jitter=args.jitter, loss=args.loss,
+                         timeout=args.timeout, flap_rate=args.flap_rate)
+    strip = FakeKasaStrip(host=args.host, port=args.port, children=args.children, faults=faults, seed=args.seed)
+    await strip.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await strip.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Kasa power strip for latency and fault testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--children", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed response delay (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay up to this many seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="Probability of dropping a request")
+    parser.add_argument("--timeout", type=float, default=0.0, help="Probability of hanging on a request")
+    parser.add_argument("--flap-rate", type=float, default=0.0, help="Per-second probability a relay flips by itself")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
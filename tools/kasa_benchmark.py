@@ -0,0 +1,138 @@
+# tools/kasa_benchmark.py
+"""
+以真正的 KasaClient / RawKasaClient 對本機假延長線（tools.fake_kasa_strip）做壓力測試。
+
+每個情境會：
+1. 以固定間隔交替送出 turn_on / turn_off 意圖，量測「意圖 → 設備收到 set_relay_state」的延遲
+2. 統計漏掉的切換（下一個意圖前設備都沒收到）與重複的切換（設備收到與現況相同的指令）
+3. 關閉假設備再重新啟動，量測 client 恢復取得狀態所需的時間
+
+用法：
+    python -m tools.kasa_benchmark --switches 40 --interval 0.5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+
+from hardware.kasa_client import KasaClient
+from hardware.raw_kasa_client import RawKasaClient
+from tools.fake_kasa_strip import FakeKasaStrip, FaultConfig
+
+SCENARIOS = {
+    "clean": FaultConfig(),
+    "latency": FaultConfig(latency=0.05, jitter=0.05),
+    "loss": FaultConfig(latency=0.01, loss=0.1),
+    "timeouts": FaultConfig(latency=0.01, timeout=0.05),
+    "flapping": FaultConfig(latency=0.01, flap_rate=0.05),
+}
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_scenario(name: str, faults: FaultConfig, switches: int, interval: float,
+                       reconnect_timeout: float, seed: int) -> dict:
+    loop = asyncio.get_running_loop()
+    strip = FakeKasaStrip(port=0, faults=faults, seed=seed)
+    await strip.start()
+
+    cache_path = os.path.join(tempfile.mkdtemp(prefix="kasa-bench-"), "kasa_device.json")
+    device_client = RawKasaClient(cache_path=cache_path, discovery_target=strip.host, port=strip.port,
+                                  discovery_timeout=1.0)
+    client = KasaClient(min_op_interval=interval / 2, update_interval=0.1, max_poll_interval=1.0,
+                        device_client=device_client)
+    await client.start_updater()
+
+    # 等 client 第一次取得狀態（探索 + 連線）
+    started = loop.time()
+    while client.is_on() is None and loop.time() - started < reconnect_timeout:
+        await asyncio.sleep(0.01)
+    startup_time = loop.time() - started
+
+    # 1. 交替切換
+    intents = []
+    for i in range(switches):
+        desired = i % 2 == 0
+        intents.append((loop.time(), desired))
+        await (client.turn_on() if desired else client.turn_off())
+        await asyncio.sleep(interval)
+    end_time = loop.time()
+
+    latencies, missed = [], 0
+    socket_log = [(t, new, old) for t, idx, new, old in strip.relay_log if idx == 0]
+    for n, (intent_time, desired) in enumerate(intents):
+        deadline = intents[n + 1][0] if n + 1 < len(intents) else end_time
+        hit = next((t for t, new, _ in socket_log if intent_time <= t < deadline and new == desired), None)
+        if hit is None:
+            missed += 1
+        else:
+            latencies.append(hit - intent_time)
+    duplicated = sum(1 for _, new, old in socket_log if new == old)
+
+    # 2. 設備離線再上線
+    await strip.stop()
+    await asyncio.sleep(1.0)
+    strip = FakeKasaStrip(port=strip.port, faults=FaultConfig(), seed=seed)
+    await strip.start()
+    restarted = loop.time()
+    requests_before = strip.request_count
+    while strip.request_count == requests_before and loop.time() - restarted < reconnect_timeout:
+        await asyncio.sleep(0.01)
+    # 等到 client 真的拿到狀態
+    while client.is_on() is None and loop.time() - restarted < reconnect_timeout:
+        await asyncio.sleep(0.01)
+    reconnect_time = loop.time() - restarted
+
+    client._state_updater_task.cancel()
+    await device_client.close()
+    await strip.stop()
+
+    return {
+        "scenario": name,
+        "startup": startup_time,
+        "p50": percentile(latencies, 0.5),
+        "p90": percentile(latencies, 0.9),
+        "p99": percentile(latencies, 0.99),
+        "missed": missed,
+        "duplicated": duplicated,
+        "flaps": len(strip.flap_log),
+        "reconnect": reconnect_time,
+        "requests": device_client.get_request_latencies(),
+    }
+
+
+async def main_async(args):
+    names = args.scenario or list(SCENARIOS)
+    print(f"{'scenario':<10} {'startup':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'missed':>7} {'dup':>5} {'reconnect':>10} {'req p50 ms':>11}")
+    for name in names:
+        r = await run_scenario(name, SCENARIOS[name], args.switches, args.interval, args.reconnect_timeout, args.seed)
+        request_p50 = percentile([latency for _, latency in r["requests"]], 0.5)
+        print(f"{r['scenario']:<10} {r['startup']:>7.2f}s {r['p50'] * 1000:>8.1f} {r['p90'] * 1000:>8.1f} "
+              f"{r['p99'] * 1000:>8.1f} {r['missed']:>7} {r['duplicated']:>5} {r['reconnect']:>9.2f}s "
+              f"{request_p50 * 1000:>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KasaClient against a fake Kasa strip")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="Scenario to run (repeatable); default runs all")
+    parser.add_argument("--switches", type=int, default=40, help="Number of alternating on/off intents")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between intents")
+    parser.add_argument("--reconnect-timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
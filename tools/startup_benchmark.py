@@ -0,0 +1,102 @@
+# tools/startup_benchmark.py
+"""
+量測冷啟動時間：每一輪都在新的 Python 行程中執行，分別記錄
+1. import cooker.controller
+2. 建立 SousVideController
+3. 第一次 tick
+4. 取得第一筆溫度樣本
+並列出被載入的重量級模組（gpiozero、tm1637、kasa、flask）。
+
+預設全部使用 simulated 後端，可在任何 Linux 上執行；--config-backends 改用 config.yaml 的設定（實機）。
+
+用法：
+    python -m tools.startup_benchmark --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = ("gpiozero", "tm1637", "kasa", "flask")
+PHASES = ("import", "construct", "first_tick", "first_sample")
+
+
+def _child(use_config_backends: bool):
+    started = time.perf_counter()
+    import dataclasses
+    from config.config_manager import BackendsConfig, ConfigManager
+    from cooker.controller import SousVideController
+    imported = time.perf_counter()
+
+    config = ConfigManager().snapshot
+    if not use_config_backends:
+        simulated = {f.name: "simulated" for f in dataclasses.fields(BackendsConfig)}
+        config = dataclasses.replace(config, backends=BackendsConfig(**simulated))
+
+    os.chdir(tempfile.mkdtemp(prefix="startup-bench-"))  # 紀錄檔寫到暫存目錄
+    controller = SousVideController(config=config)
+    controller.active = True
+    constructed = time.perf_counter()
+
+    async def first_tick():
+        await controller.tick()
+        ticked = time.perf_counter()
+        while controller.temperature_sampler.get_latest() is None:
+            await asyncio.sleep(0.005)
+        return ticked, time.perf_counter()
+
+    ticked, sampled = asyncio.run(first_tick())
+    controller.temperature_sampler.stop()
+    controller.data_logger.close()
+
+    print(json.dumps({
+        "import": imported - started,
+        "construct": constructed - imported,
+        "first_tick": ticked - constructed,
+        "first_sample": sampled - constructed,
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+        "modules": len(sys.modules),
+    }))
+
+
+def run(runs: int, use_config_backends: bool) -> list[dict]:
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [sys.executable, "-m", "tools.startup_benchmark", "--child"]
+    if use_config_backends:
+        command.append("--config-backends")
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(command, cwd=repo_root, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start of the sous-vide controller")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--config-backends", action="store_true",
+                        help="Use the backends from config.yaml instead of simulated ones")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.config_backends)
+        return
+
+    results = run(args.runs, args.config_backends)
+    print(f"{'phase':<13} {'median ms':>10} {'min ms':>9} {'max ms':>9}")
+    for phase in PHASES:
+        values = [r[phase] * 1000 for r in results]
+        print(f"{phase:<13} {statistics.median(values):>10.1f} {min(values):>9.1f} {max(values):>9.1f}")
+    print(f"modules loaded: {results[-1]['modules']}, "
+          f"heavy modules: {', '.join(results[-1]['heavy_modules']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
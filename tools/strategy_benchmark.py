@@ -0,0 +1,180 @@
+# tools/strategy_benchmark.py
+"""
+以批次水浴模型（cooker.thermal_plant）對溫控策略做閉環基準測試。
+
+對「水量 × 初始水溫 × 室溫 × 目標溫度」的每個組合各建立一個策略實例，所有情境同步推進；
+策略看到的是感測器讀值與插座的實際狀態，決定則經過插座延遲後才生效。
+
+每個情境的指標：
+- overshoot   ：第一次到達目標後，水溫超過目標的最大值（°C）
+- settling    ：水溫最後一次離開「目標 ± band」後進入並一直留在區間內的時間（秒），沒有穩定則為 NaN
+- steady band ：最後 steady_fraction 時間內水溫的峰對峰值（°C）
+- switches/h  ：relay 每小時切換次數
+
+需要 numpy。用法：
+    python -m tools.strategy_benchmark --hours 3 --volumes 5,10,20 --targets 55,60,63,68
+    python -m tools.strategy_benchmark --strategy two_phase --param two_phase.band=3 --csv results.csv
+"""
+
+import argparse
+import csv
+import itertools
+import logging
+import time
+
+import numpy as np
+
+from cooker.replay import VirtualClock
+from cooker.strategies import STRATEGIES
+from cooker.thermal_plant import BatchThermalPlant
+
+
+def _decide(strategy, temperature: float, plug_on: bool) -> bool | None:
+    """直接驅動 decide_action 協程；策略不會真的 await，省下每次呼叫 event loop 的成本。"""
+    coroutine = strategy.decide_action(temperature, plug_on)
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    coroutine.close()
+    raise RuntimeError(f"{type(strategy).__name__}.decide_action suspended; batch simulation needs it to finish")
+
+
+def build_grid(volumes, start_temperatures, ambients, targets) -> dict[str, np.ndarray]:
+    rows = list(itertools.product(volumes, start_temperatures, ambients, targets))
+    columns = np.array(rows, dtype=float).T
+    return dict(zip(("volume", "start_temperature", "ambient", "target"), columns))
+
+
+def run_strategy(strategy_name: str, grid: dict[str, np.ndarray], params: dict, hours: float, dt: float,
+                 band: float, steady_fraction: float, plant_options: dict) -> dict[str, np.ndarray]:
+    """對整個網格跑一種策略，回傳每個情境的指標陣列。"""
+    targets = grid["target"]
+    size = targets.size
+    plant = BatchThermalPlant(grid["volume"], grid["start_temperature"], grid["ambient"], dt=dt, **plant_options)
+    clock = VirtualClock(0.0)
+    strategies = [STRATEGIES[strategy_name](target_temperature=float(target), clock=clock, **params)
+                  for target in targets]
+
+    steps = int(hours * 3600 / dt)
+    steady_start = steps * (1.0 - steady_fraction)
+    commands = np.zeros(size, dtype=bool)
+    reached = np.zeros(size, dtype=bool)
+    overshoot = np.zeros(size)
+    last_outside = np.zeros(size)
+    steady_min = np.full(size, np.inf)
+    steady_max = np.full(size, -np.inf)
+
+    for step in range(steps):
+        clock.now = plant.time
+        readings = plant.read_sensor().tolist()
+        relay = plant.relay.tolist()
+        for i, strategy in enumerate(strategies):
+            action = _decide(strategy, readings[i], relay[i])
+            if action is not None:
+                commands[i] = action
+        plant.step(commands)
+
+        temperature = plant.temperature
+        error = temperature - targets
+        reached |= error >= 0
+        np.maximum(overshoot, np.where(reached, error, 0.0), out=overshoot)
+        last_outside = np.where(np.abs(error) > band, plant.time, last_outside)
+        if step >= steady_start:
+            np.minimum(steady_min, temperature, out=steady_min)
+            np.maximum(steady_max, temperature, out=steady_max)
+
+    settled = last_outside < plant.time
+    return {
+        "overshoot": overshoot,
+        "settling": np.where(settled, last_outside, np.nan),
+        "steady_band": steady_max - steady_min,
+        "switches_per_hour": plant.switches / hours,
+    }
+
+
+def _floats(text: str) -> list[float]:
+    return [float(v) for v in text.split(",") if v]
+
+
+def _parse_param(text: str) -> tuple[str, str, float]:
+    name, _, value = text.partition("=")
+    strategy, _, key = name.partition(".")
+    if not key or not value:
+        raise argparse.ArgumentTypeError(f"Expected strategy.key=value, got '{text}'")
+    return strategy, key, float(value)
+
+
+def _summary(values: np.ndarray, scale: float = 1.0) -> str:
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return f"{'-':>8} {'-':>8}"
+    return f"{np.median(finite) * scale:>8.2f} {np.percentile(finite, 90) * scale:>8.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Closed-loop strategy benchmark on a simulated water bath")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), action="append",
+                        help="Strategy to run (repeatable); default runs all")
+    parser.add_argument("--param", type=_parse_param, action="append", default=[],
+                        help="Strategy parameter, e.g. two_phase.band=3 or simple_on_off.offset=1")
+    parser.add_argument("--volumes", type=_floats, default=[5, 10, 15, 20, 30], help="Water volumes (L)")
+    parser.add_argument("--starts", type=_floats, default=[10, 20, 30, 45], help="Start temperatures (°C)")
+    parser.add_argument("--ambients", type=_floats, default=[15, 22, 30], help="Ambient temperatures (°C)")
+    parser.add_argument("--targets", type=_floats, default=[55, 58, 61, 63, 65, 68], help="Targets (°C)")
+    parser.add_argument("--hours", type=float, default=3.0, help="Simulated duration per cook")
+    parser.add_argument("--dt", type=float, default=1.0, help="Step size, i.e. the polling interval (s)")
+    parser.add_argument("--band", type=float, default=0.5, help="Half-width of the settling band (°C)")
+    parser.add_argument("--steady-fraction", type=float, default=0.3,
+                        help="Fraction at the end of the run used for the steady-state band")
+    parser.add_argument("--heater-power", type=float, default=1000.0, help="Heater power (W)")
+    parser.add_argument("--loss", type=float, default=4.0, help="Heat loss coefficient (W/K)")
+    parser.add_argument("--sensor-tau", type=float, default=15.0, help="Sensor time constant (s)")
+    parser.add_argument("--plug-delay", type=float, default=1.0, help="Plug switching delay (s)")
+    parser.add_argument("--noise", type=float, default=0.0, help="Sensor noise std-dev (°C)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--csv", help="Write per-scenario metrics to this CSV file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.INFO)  # 策略每次決策都會記 INFO，批次模擬時關掉
+
+    grid = build_grid(args.volumes, args.starts, args.ambients, args.targets)
+    plant_options = {
+        "heater_power": args.heater_power,
+        "loss_coefficient": args.loss,
+        "sensor_tau": args.sensor_tau,
+        "plug_delay": args.plug_delay,
+        "noise": args.noise,
+        "seed": args.seed,
+    }
+    names = args.strategy or sorted(STRATEGIES)
+    print(f"{grid['target'].size} scenarios x {args.hours:g} h, dt {args.dt:g} s")
+    print(f"{'strategy':<14} {'overshoot °C':>17} {'settling min':>17} {'unsettled':>9} "
+          f"{'steady band °C':>17} {'switches/h':>17} {'wall s':>7}")
+    print(f"{'':<14} {'p50':>8} {'p90':>8} {'p50':>8} {'p90':>8} {'':>9} "
+          f"{'p50':>8} {'p90':>8} {'p50':>8} {'p90':>8}")
+
+    rows = []
+    for name in names:
+        params = {key: value for strategy, key, value in args.param if strategy == name}
+        started = time.perf_counter()
+        metrics = run_strategy(name, grid, params, args.hours, args.dt, args.band, args.steady_fraction,
+                               plant_options)
+        elapsed = time.perf_counter() - started
+        unsettled = np.isnan(metrics["settling"]).mean()
+        print(f"{name:<14} {_summary(metrics['overshoot'])} {_summary(metrics['settling'], 1 / 60)} "
+              f"{unsettled:>9.1%} {_summary(metrics['steady_band'])} {_summary(metrics['switches_per_hour'])} "
+              f"{elapsed:>7.1f}")
+        for i in range(grid["target"].size):
+            rows.append({"strategy": name, **{k: grid[k][i] for k in grid}, **{k: metrics[k][i] for k in metrics}})
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
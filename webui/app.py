@@ -1,13 +1,17 @@
 # webui/app.py
 
-from flask import Flask, jsonify, render_template
+from flask import Flask, Response, jsonify, render_template, request
 import threading
 
+import logger_config
+
 
 class WebUI:
+    STREAM_KEEPALIVE = 15.0  # 秒；沒有事件時送出註解行，避免連線被中間設備切斷
+
     def __init__(self, controller, host="0.0.0.0", port=5000):
         self.controller = controller
-        self.system_status = controller.system_status
+        self.system_status = controller.get_system_status()
         self.host = host
         self.port = port
         self.app = Flask(__name__, template_folder="templates", static_folder="static")
@@ -24,12 +28,89 @@ class WebUI:
 
         @self.app.route("/temperature_history")
         def get_temperature_history():
-            history = self.system_status.get_temperature_history()
-            return jsonify(history)
+            # since=<timestamp> 只取新資料；max_points=<n> 由伺服器端縮減點數
+            since = request.args.get("since", type=float)
+            max_points = request.args.get("max_points", type=int)
+            return jsonify(self.system_status.query_temperature_history(since=since, max_points=max_points))
+
+        @self.app.route("/stream")
+        def stream_status():
+            # Server-Sent Events：每個 tick 推送一筆狀態事件
+            subscription = self.system_status.stream.subscribe()
+            if subscription is None:
+                return Response("Too many stream clients", status=503)
+
+            def events():
+                try:
+                    while not subscription.closed:
+                        event = subscription.get(timeout=self.STREAM_KEEPALIVE)
+                        if event is None:
+                            yield ": keepalive\n\n"
+                        else:
+                            yield f"data: {event}\n\n"
+                finally:
+                    self.system_status.stream.unsubscribe(subscription)
+
+            return Response(events(), mimetype="text/event-stream",
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        @self.app.route("/probe_history")
+        def get_probe_history():
+            return jsonify(self.system_status.get_probe_histories())
+
+        @self.app.route("/metrics")
+        def get_metrics():
+            # Prometheus 抓取用：tick 各階段的延遲直方圖與狀態 gauge
+            return Response(self.system_status.render_metrics(), mimetype="text/plain; version=0.0.4")
+
+        @self.app.route("/stall_profile")
+        def get_stall_profile():
+            # 可用 flamegraph.pl 或 speedscope 開啟
+            profile = self.system_status.get_stall_profile()
+            if profile is None:
+                return Response("Stall watchdog disabled", status=404)
+            return Response(profile, mimetype="text/plain",
+                            headers={"Content-Disposition": "attachment; filename=stall_profile.folded"})
+
+        @self.app.route("/logs")
+        def get_logs():
+            # 記憶體中的最近紀錄；level=<LEVEL> 過濾，limit=<n> 只取最後幾筆
+            try:
+                records = logger_config.get_recent_records(
+                    limit=request.args.get("limit", type=int), min_level=request.args.get("level", "NOTSET"))
+            except ValueError as e:
+                return Response(str(e), status=400)
+            return jsonify(records)
+
+        @self.app.route("/log_level", methods=["GET", "POST"])
+        def log_level():
+            # GET 只回傳目前設定；POST name=<logger>&level=<LEVEL> 在執行期間調整層級
+            if request.method == "POST":
+                level = request.values.get("level")
+                if not level:
+                    return Response("Missing level", status=400)
+                try:
+                    logger_config.set_log_level(request.values.get("name", "root"), level)
+                except ValueError as e:
+                    return Response(str(e), status=400)
+            return jsonify(logger_config.get_log_levels())
+
+        @self.app.route("/autotune", methods=["GET", "POST"])
+        def autotune():
+            # GET 只回傳目前狀態；POST action=start 開始自動調參、action=cancel 取消
+            if request.method == "POST":
+                action = request.form.get("action")
+                if not action:
+                    return Response("Missing action", status=400)
+                try:
+                    self.controller.request_autotune(action)
+                except ValueError as e:
+                    return Response(str(e), status=400)
+            return jsonify(self.controller.get_autotune_status())
         # 更多 routes 可以在這裡註冊...
 
     def run(self):
-        self.app.run(host=self.host, port=self.port)
+        self.app.run(host=self.host, port=self.port, threaded=True)
 
     def run_in_background(self):
         thread = threading.Thread(target=self.run, daemon=True)
@@ -0,0 +1,324 @@
+# webui/async_server.py
+
+import asyncio
+import json
+import logging
+import mimetypes
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import logger_config
+
+logger = logging.getLogger(__name__)
+
+_WEBUI_DIR = Path(__file__).resolve().parent
+
+
+class AsyncWebServer:
+    """
+    與控制迴圈共用同一個 asyncio event loop 的輕量 HTTP 伺服器（不依賴 Flask）。
+    提供與 WebUI 相同的路由；網頁流量不會拖慢 SousVideController.tick()：
+    - 同時處理中的請求數有上限（/stream 不佔名額，由 StatusStream 的訂閱上限控制）
+    - 輕量路由直接在 event loop 上執行；需要複製歷史資料或序列化大量資料的路由丟到執行緒池，
+      request_timeout 是連線等待回應的上限（逾時只會放棄回應，不會中斷已在執行緒中的工作）
+
+    只支援 GET、表單格式的 POST 與 Connection: close，足夠給瀏覽器與儀表板使用。
+    會改變狀態的操作只接受 POST，避免預先載入、爬蟲或跨站 <img> 之類的 GET 觸發。
+    """
+    MAX_HEADER_BYTES = 8192
+    MAX_BODY_BYTES = 4096
+    MAX_HISTORY_POINTS = 2000  # 每個請求序列化的歷史點數上限
+    STREAM_KEEPALIVE = 15.0  # 秒
+
+    def __init__(self, controller, host="0.0.0.0", port=5000, max_connections: int = 8,
+                 request_timeout: float = 2.0):
+        self.controller = controller
+        self.system_status = controller.get_system_status()
+        self.host = host
+        self.port = port
+        self.request_timeout = request_timeout
+        self._connections = asyncio.Semaphore(max_connections)
+        self._server: asyncio.AbstractServer | None = None
+        self._static_cache: dict[str, tuple[bytes, str]] = {}
+
+        self._routes = {
+            "/": self._index,
+            "/status": self._status,
+            "/log_level": self._log_level,
+            "/autotune": self._autotune,
+        }
+        # 只接受 POST（application/x-www-form-urlencoded）的路由
+        self._post_routes = {
+            "/log_level": self._set_log_level,
+            "/autotune": self._set_autotune,
+        }
+        # 在執行緒池執行的路由（與 Flask 模式一樣從其他執行緒讀取狀態）
+        self._offloaded_routes = {
+            "/temperature_history": self._temperature_history,
+            "/probe_history": self._probe_history,
+            "/metrics": self._metrics,
+            "/stall_profile": self._stall_profile,
+            "/logs": self._logs,
+        }
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        logger.info(f"AsyncWebServer listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self._connections.locked():
+            # 超過連線上限直接拒絕，不排隊佔用資源
+            await self._safe_write(writer, self._response(HTTPStatus.SERVICE_UNAVAILABLE, b"Server busy"))
+            return
+        streaming = False
+        async with self._connections:
+            try:
+                method, path, query = await asyncio.wait_for(self._read_request(reader), self.request_timeout)
+                if method == "GET" and path == "/stream":
+                    streaming = True  # 離開 semaphore 後再開始串流，長時間連線不佔請求名額
+                    return
+                response = await asyncio.wait_for(self._dispatch(method, path, query), self.request_timeout)
+                await asyncio.wait_for(self._write(writer, response), self.request_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("AsyncWebServer: Request exceeded time budget, closing connection.")
+            except _HttpError as e:
+                await self._safe_write(writer, self._response(e.status, e.status.phrase.encode()))
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            except Exception as e:
+                logger.error(f"AsyncWebServer: Error handling request: {e}", exc_info=True)
+                await self._safe_write(writer, self._response(HTTPStatus.INTERNAL_SERVER_ERROR, b"Internal error"))
+            finally:
+                if not streaming:
+                    writer.close()
+        if streaming:
+            try:
+                await self._stream(writer)
+            finally:
+                writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> tuple[str, str, dict]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise _HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+        if len(head) > self.MAX_HEADER_BYTES:
+            raise _HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+        request_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise _HttpError(HTTPStatus.BAD_REQUEST)
+        method, target, _ = parts
+        if method not in ("GET", "POST"):
+            raise _HttpError(HTTPStatus.METHOD_NOT_ALLOWED)
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if method == "POST":
+            # 表單欄位與網址參數合併，表單優先
+            for key, values in parse_qs((await self._read_body(reader, head)).decode("latin-1")).items():
+                query[key] = values
+        return method, url.path, query
+
+    async def _read_body(self, reader: asyncio.StreamReader, head: bytes) -> bytes:
+        length = 0
+        for line in head.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                try:
+                    length = int(value.strip())
+                except ValueError:
+                    raise _HttpError(HTTPStatus.BAD_REQUEST)
+        if length < 0:
+            raise _HttpError(HTTPStatus.BAD_REQUEST)
+        if length > self.MAX_BODY_BYTES:
+            raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        return await reader.readexactly(length) if length else b""
+
+    async def _dispatch(self, method: str, path: str, query: dict) -> bytes:
+        if method == "POST":
+            handler = self._post_routes.get(path)
+            if handler is None:
+                raise _HttpError(HTTPStatus.METHOD_NOT_ALLOWED if path in self._routes else HTTPStatus.NOT_FOUND)
+            return handler(query)
+        handler = self._routes.get(path)
+        if handler is not None:
+            return handler(query)
+        handler = self._offloaded_routes.get(path)
+        if handler is not None:
+            return await asyncio.get_running_loop().run_in_executor(None, handler, query)
+        if path.startswith("/static/"):
+            return self._static(path[len("/static/"):])
+        raise _HttpError(HTTPStatus.NOT_FOUND)
+
+    # --- routes -----------------------------------------------------------
+
+    def _index(self, query: dict) -> bytes:
+        body, content_type = self._load_file(_WEBUI_DIR / "templates" / "index.html")
+        return self._response(HTTPStatus.OK, body, content_type)
+
+    def _status(self, query: dict) -> bytes:
+        return self._json(self.system_status.snapshot())
+
+    def _temperature_history(self, query: dict) -> bytes:
+        since = _query_value(query, "since", float)
+        max_points = _query_value(query, "max_points", int)
+        # 限制每次序列化的點數，避免單一請求長時間佔用執行緒與 GIL
+        if max_points is None or max_points > self.MAX_HISTORY_POINTS:
+            max_points = self.MAX_HISTORY_POINTS
+        return self._json(self.system_status.query_temperature_history(since=since, max_points=max_points))
+
+    def _probe_history(self, query: dict) -> bytes:
+        return self._json(self.system_status.get_probe_histories())
+
+    def _metrics(self, query: dict) -> bytes:
+        return self._response(HTTPStatus.OK, self.system_status.render_metrics().encode(),
+                              "text/plain; version=0.0.4; charset=utf-8")
+
+    def _stall_profile(self, query: dict) -> bytes:
+        profile = self.system_status.get_stall_profile()
+        if profile is None:
+            raise _HttpError(HTTPStatus.NOT_FOUND)
+        return self._response(HTTPStatus.OK, profile.encode(), "text/plain; charset=utf-8",
+                              headers={"Content-Disposition": "attachment; filename=stall_profile.folded"})
+
+    def _logs(self, query: dict) -> bytes:
+        try:
+            records = logger_config.get_recent_records(
+                limit=_query_value(query, "limit", int), min_level=_query_value(query, "level", str) or "NOTSET")
+        except ValueError:
+            raise _HttpError(HTTPStatus.BAD_REQUEST)
+        return self._json(records)
+
+    def _log_level(self, query: dict) -> bytes:
+        return self._json(logger_config.get_log_levels())
+
+    def _set_log_level(self, query: dict) -> bytes:
+        level = _query_value(query, "level", str)
+        if not level:
+            raise _HttpError(HTTPStatus.BAD_REQUEST)
+        try:
+            logger_config.set_log_level(_query_value(query, "name", str) or "root", level)
+        except ValueError:
+            raise _HttpError(HTTPStatus.BAD_REQUEST)
+        return self._json(logger_config.get_log_levels())
+
+    def _autotune(self, query: dict) -> bytes:
+        return self._json(self.controller.get_autotune_status())
+
+    def _set_autotune(self, query: dict) -> bytes:
+        action = _query_value(query, "action", str)
+        if not action:
+            raise _HttpError(HTTPStatus.BAD_REQUEST)
+        try:
+            self.controller.request_autotune(action)
+        except ValueError:
+            raise _HttpError(HTTPStatus.BAD_REQUEST)
+        return self._json(self.controller.get_autotune_status())
+
+    def _static(self, relative: str) -> bytes:
+        static_dir = _WEBUI_DIR / "static"
+        path = (static_dir / relative).resolve()
+        if static_dir not in path.parents or not path.is_file():
+            raise _HttpError(HTTPStatus.NOT_FOUND)
+        body, content_type = self._load_file(path)
+        return self._response(HTTPStatus.OK, body, content_type)
+
+    async def _stream(self, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        subscription = self.system_status.stream.subscribe(
+            on_event=lambda: loop.call_soon_threadsafe(wakeup.set))
+        if subscription is None:
+            await self._safe_write(writer, self._response(HTTPStatus.SERVICE_UNAVAILABLE, b"Too many stream clients"))
+            return
+
+        try:
+            header = (
+                "HTTP/1.1 200 OK\r\n"
+                "Content-Type: text/event-stream\r\n"
+                "Cache-Control: no-cache\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode()
+            await asyncio.wait_for(self._write(writer, header), self.request_timeout)
+            while not subscription.closed:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    await asyncio.wait_for(self._write(writer, b": keepalive\n\n"), self.request_timeout)
+                    continue
+                wakeup.clear()
+                chunks = []
+                while (event := subscription.get(timeout=0)) is not None:
+                    chunks.append(f"data: {event}\n\n".encode())
+                if chunks:
+                    # 寫入逾時代表客戶端太慢，直接斷線，不讓資料堆積
+                    await asyncio.wait_for(self._write(writer, b"".join(chunks)), self.request_timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.system_status.stream.unsubscribe(subscription)
+
+    # --- helpers ----------------------------------------------------------
+
+    def _load_file(self, path: Path) -> tuple[bytes, str]:
+        key = str(path)
+        if key not in self._static_cache:
+            content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+            if content_type.startswith("text/") or content_type == "application/javascript":
+                content_type += "; charset=utf-8"
+            self._static_cache[key] = (path.read_bytes(), content_type)
+        return self._static_cache[key]
+
+    def _json(self, payload) -> bytes:
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        return self._response(HTTPStatus.OK, body, "application/json")
+
+    @staticmethod
+    def _response(status: HTTPStatus, body: bytes, content_type: str = "text/plain; charset=utf-8",
+                  headers: dict | None = None) -> bytes:
+        extra = "".join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+        header = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"{extra}"
+            "Connection: close\r\n\r\n"
+        ).encode()
+        return header + body
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, data: bytes):
+        writer.write(data)
+        await writer.drain()
+
+    async def _safe_write(self, writer: asyncio.StreamWriter, data: bytes):
+        try:
+            await asyncio.wait_for(self._write(writer, data), self.request_timeout)
+        except Exception:
+            pass
+        finally:
+            writer.close()
+
+
+class _HttpError(Exception):
+    def __init__(self, status: HTTPStatus):
+        super().__init__(status.phrase)
+        self.status = status
+
+
+def _query_value(query: dict, key: str, cast):
+    values = query.get(key)
+    if not values:
+        return None
+    try:
+        return cast(values[0])
+    except ValueError:
+        raise _HttpError(HTTPStatus.BAD_REQUEST)
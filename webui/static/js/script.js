@@ -1,23 +1,37 @@
-async function fetchTemperatureData() {
+const MAX_POINTS = 600;          // 伺服器端縮減後的點數上限
+const REFRESH_INTERVAL_MS = 5000;
+
+let chart = null;
+let latestTimestamp = null;
+let streamConnected = false;
+
+async function fetchTemperatureData(since) {
+    const params = new URLSearchParams({ max_points: MAX_POINTS });
+    if (since !== null) {
+        params.set("since", since);
+    }
     try {
-        const response = await fetch("/api/temperature-history");
-        const data = await response.json();
-        return data;
+        const response = await fetch(`/temperature_history?${params}`);
+        return await response.json();
     } catch (error) {
         console.error("Error fetching temperature data:", error);
-        return [];
+        return null;
     }
 }
 
-function renderChart(data) {
+function toChartPoints(points) {
+    // points: [[timestamp, temperature, heating], ...]
+    return points.map(p => ({ x: p[0] * 1000, y: p[1] }));
+}
+
+function renderChart(points) {
     const ctx = document.getElementById("temperature-chart").getContext("2d");
-    const chart = new Chart(ctx, {
+    chart = new Chart(ctx, {
         type: "line",
         data: {
-            labels: data.map(d => new Date(d.timestamp * 1000).toLocaleTimeString()),
             datasets: [{
                 label: "Water Temperature (°C)",
-                data: data.map(d => d.temperature),
+                data: toChartPoints(points),
                 borderColor: "rgba(75, 192, 192, 1)",
                 backgroundColor: "rgba(75, 192, 192, 0.2)",
                 borderWidth: 2,
@@ -26,10 +40,13 @@ function renderChart(data) {
             }]
         },
         options: {
+            parsing: false,
             scales: {
                 x: {
+                    type: "linear",
                     ticks: {
-                        maxTicksLimit: 10
+                        maxTicksLimit: 10,
+                        callback: value => new Date(value).toLocaleTimeString()
                     }
                 },
                 y: {
@@ -45,7 +62,113 @@ function renderChart(data) {
     });
 }
 
+async function reloadAll() {
+    const result = await fetchTemperatureData(null);
+    if (result === null) {
+        return;
+    }
+    latestTimestamp = result.latest;
+    if (chart === null) {
+        renderChart(result.points);
+    } else {
+        chart.data.datasets[0].data = toChartPoints(result.points);
+        chart.update();
+    }
+}
+
+async function refreshIncremental() {
+    // 串流連線中時，資料由 /stream 推送，不需要輪詢
+    if (streamConnected) {
+        return;
+    }
+    const result = await fetchTemperatureData(latestTimestamp);
+    if (result === null || result.points.length === 0) {
+        return;
+    }
+    latestTimestamp = result.latest;
+    const data = chart.data.datasets[0].data;
+    data.push(...toChartPoints(result.points));
+    // 累積太多點時，重新向伺服器要一份縮減過的完整資料
+    if (data.length > 2 * MAX_POINTS) {
+        await reloadAll();
+        return;
+    }
+    chart.update();
+}
+
+function renderStatus(event) {
+    const heating = event.heating === null ? "未知" : (event.heating ? "加熱中" : "停止");
+    const temperature = event.temperature === null ? "--" : event.temperature.toFixed(2);
+    document.getElementById("status").textContent =
+        `水溫 ${temperature}°C ／ 目標 ${event.target.toFixed(1)}°C ／ 插座 ${heating}`;
+}
+
+function renderAutotune(status) {
+    const button = document.getElementById("autotune-button");
+    const text = document.getElementById("autotune-status");
+    button.textContent = status.running ? "取消調參" : "自動調參";
+    button.dataset.action = status.running ? "cancel" : "start";
+    if (status.running) {
+        text.textContent = status.phase === "heating_up"
+            ? `調參中：升溫到目標，已 ${Math.round(status.heatup_elapsed / 60)} 分鐘`
+            : `調參中：${status.cycles}/${status.target_cycles} 個週期，已振盪 ${Math.round(status.elapsed / 60)} 分鐘`;
+    } else if (status.error) {
+        text.textContent = `上次調參失敗：${status.error}`;
+    } else if (status.result) {
+        const r = status.result;
+        text.textContent = `上次調參：週期 ${r.period.toFixed(0)} 秒，振幅 ${r.amplitude.toFixed(2)}°C，延遲 ${r.lag.toFixed(0)} 秒`;
+    } else {
+        text.textContent = "";
+    }
+}
+
+async function refreshAutotune(action) {
+    // 開始 / 取消用 POST，GET 只讀取狀態
+    const options = action ? { method: "POST", body: new URLSearchParams({ action }) } : {};
+    try {
+        const response = await fetch("/autotune", options);
+        if (!response.ok) {
+            document.getElementById("autotune-status").textContent =
+                action === "start" ? "請先打開開關再開始調參" : `無法${action === "cancel" ? "取消" : "更新"}調參`;
+            return;
+        }
+        renderAutotune(await response.json());
+    } catch (error) {
+        console.error("Error fetching autotune status:", error);
+    }
+}
+
+function connectStream() {
+    const source = new EventSource("/stream");
+    source.onopen = () => { streamConnected = true; };
+    source.onerror = () => { streamConnected = false; };  // EventSource 會自動重連
+    source.onmessage = message => {
+        const event = JSON.parse(message.data);
+        renderStatus(event);
+        if (!event.active || event.sample_time === null || chart === null) {
+            return;
+        }
+        // 用歷史紀錄中樣本自己的時間（而非推送時間），與 /temperature_history?since= 的增量查詢一致
+        if (latestTimestamp !== null && event.sample_time <= latestTimestamp) {
+            return;
+        }
+        latestTimestamp = event.sample_time;
+        const data = chart.data.datasets[0].data;
+        data.push({ x: event.sample_time * 1000, y: event.sample_temperature });
+        if (data.length > 2 * MAX_POINTS) {
+            reloadAll();
+            return;
+        }
+        chart.update();
+    };
+}
+
 document.addEventListener("DOMContentLoaded", async () => {
-    const data = await fetchTemperatureData();
-    renderChart(data);
-});
\ No newline at end of file
+    await reloadAll();
+    connectStream();
+    setInterval(refreshIncremental, REFRESH_INTERVAL_MS);
+    const autotuneButton = document.getElementById("autotune-button");
+    autotuneButton.addEventListener("click", () => refreshAutotune(autotuneButton.dataset.action));
+    await refreshAutotune(null);
+    setInterval(() => refreshAutotune(null), REFRESH_INTERVAL_MS);
+});